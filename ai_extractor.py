@@ -4,21 +4,117 @@ This module uses OpenAI or Anthropic APIs to extract key information from SDS do
 """
 
 import os
+import asyncio
 import base64
 import re
 import json
 import time
-from typing import Dict, List, Optional, Tuple, Union
+import random
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
 import logging
+import hashlib
+from collections import deque
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# orjson parses AI responses several times faster; fall back to the stdlib if it's missing
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Check which AI service we can use based on available API keys
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
 
+# Models used for extraction
+OPENAI_MODEL = "gpt-4o"
+# the newest Anthropic model is "claude-3-5-sonnet-20241022" which was released October 22, 2024
+ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
+
+# Per-call timeout in seconds, so a stuck request can't hold a worker indefinitely
+REQUEST_TIMEOUT = 120
+
+# Output token cap; the 18-field JSON normally needs well under this, with headroom
+# for the free-text first aid and firefighting fields
+MAX_OUTPUT_TOKENS = 1200
+
+# Bump whenever the extraction prompt changes to invalidate cached results
+PROMPT_VERSION = "v5"
+
+# Fields every extraction result must contain
+_EXPECTED_FIELDS = (
+    "Product Name", "CAS Number", "Chemical Identification", 
+    "Health Hazards", "Health Category", "Physical Hazards", 
+    "Physical Category", "Flash Point", "Appearance", "Odour", 
+    "Colour", "Storage Use", "Supplier/Manufacturer", 
+    "Dangerous Goods Class", "Packing Group", "Environmental Hazards",
+    "First Aid Measures", "Firefighting Measures"
+)
+
+# JSON schema enforced on OpenAI structured outputs: every field is a required string
+_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {field: {"type": "string"} for field in _EXPECTED_FIELDS},
+    "required": list(_EXPECTED_FIELDS),
+    "additionalProperties": False
+}
+
+# Compact field list referencing the schema; the field names carry the meaning, so
+# only the hints that change what the model picks are spelled out
+_SCHEMA_JSON = json.dumps({field: "string" for field in _EXPECTED_FIELDS}, separators=(",", ":"))
+
+# Static extraction instructions. Kept byte-for-byte stable and sent ahead of the
+# document text so OpenAI's automatic prefix cache and Anthropic's ephemeral
+# cache can reuse them across calls.
+_EXTRACTION_INSTRUCTIONS = (
+    f"Extract SDS fields as JSON matching this schema: {_SCHEMA_JSON}\n"
+    "Use only facts present in the document; leave a field empty if not found. "
+    "Health Hazards: classifications separated by \"; \". Health Category/Physical Category: GHS category numbers. "
+    "Flash Point in degrees Celsius. First Aid Measures from Section 4, Firefighting Measures from Section 5.\n"
+    "Return ONLY the JSON."
+)
+
+# Per-document user prompt
+_PROMPT_TEMPLATE = "SDS:\n{text}"
+
+_OPENAI_SYSTEM_PROMPT = "You are a chemical safety expert.\n" + _EXTRACTION_INSTRUCTIONS
+_ANTHROPIC_SYSTEM_PROMPT = [{
+    "type": "text",
+    "text": "You are a chemical safety expert.\n" + _EXTRACTION_INSTRUCTIONS,
+    "cache_control": {"type": "ephemeral"}
+}]
+
+# Patterns for pulling a JSON object out of a model response
+_CODEFENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_BRACE_RE = re.compile(r'({.*})', re.DOTALL)
+
+# Detects 1-Methyl-2-pyrrolidone (NMP) documents, which get corrected hazard fields
+_NMP_RE = re.compile(r"1-methyl-2-pyrrolid(?:in)?one|\bnmp\b|872-50-4", re.IGNORECASE)
+
+# SDS sections holding the extracted fields: identification, hazards, composition,
+# first aid, firefighting, storage, physical/chemical properties, ecology and transport
+_RELEVANT_SECTIONS = {1, 2, 3, 4, 5, 7, 9, 12, 14}
+_SECTION_HEADER_RE = re.compile(r'^\s*SECTION\s+(\d+)', re.MULTILINE | re.IGNORECASE)
+
+# Character limit for documents without recognisable section headers
+_MAX_UNSECTIONED_CHARS = 30000
+
+# Directory for cached extraction results
+CACHE_DIR = os.path.join("data", "ai_cache")
+
+# Days before a cached extraction result expires
+CACHE_TTL_DAYS = 30
+
 # Initialize appropriate AI client based on available keys
 ai_client = None
 ai_service = None
@@ -41,6 +137,512 @@ if not ai_client and ANTHROPIC_API_KEY:
     except ImportError:
         logger.warning("Anthropic package not installed despite API key being available.")
 
+# Async clients mirror the sync client for concurrent bulk extraction
+async_ai_client = None
+
+if ai_service == "openai":
+    from openai import AsyncOpenAI
+    async_ai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+elif ai_service == "anthropic":
+    from anthropic import AsyncAnthropic
+    async_ai_client = AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+
+class RateController:
+    """
+    AIMD (additive increase, multiplicative decrease) controller for AI API calls.
+    
+    Limits the number of in-flight requests to the current concurrency, which grows
+    additively on success and shrinks multiplicatively on rate limits, server errors
+    or when the provider reports that its remaining request quota is running low.
+    """
+    
+    def __init__(self, initial: float = 4, minimum: float = 1, maximum: float = 32,
+                 increase_step: float = 0.5, decrease_factor: float = 0.5, window: float = 60):
+        self.current_concurrency = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.window = window
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._request_times = deque()
+    
+    def acquire(self) -> None:
+        """Block until a request slot is available under the current concurrency."""
+        with self._condition:
+            while self._in_flight >= int(self.current_concurrency):
+                self._condition.wait()
+            self._in_flight += 1
+            self._request_times.append(time.monotonic())
+    
+    def release(self) -> None:
+        """Release a request slot."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+    
+    def increase(self) -> None:
+        """Additively increase the allowed concurrency after a successful call."""
+        with self._condition:
+            self.current_concurrency = min(self.maximum, self.current_concurrency + self.increase_step)
+            self._condition.notify_all()
+    
+    def decrease(self) -> None:
+        """Multiplicatively decrease the allowed concurrency after a throttled call."""
+        with self._condition:
+            self.current_concurrency = max(self.minimum, self.current_concurrency * self.decrease_factor)
+    
+    def requests_per_minute(self) -> int:
+        """Number of requests started within the sliding window."""
+        with self._condition:
+            cutoff = time.monotonic() - self.window
+            while self._request_times and self._request_times[0] < cutoff:
+                self._request_times.popleft()
+            return len(self._request_times)
+    
+    def update_from_headers(self, headers) -> None:
+        """
+        Adjust concurrency from the rate limit headers of a successful response.
+        
+        Args:
+            headers: The HTTP response headers
+        """
+        try:
+            if "anthropic-ratelimit-requests-remaining" in headers:
+                remaining = int(headers.get("anthropic-ratelimit-requests-remaining"))
+                limit = int(headers.get("anthropic-ratelimit-requests-limit"))
+            else:
+                remaining = int(headers.get("x-ratelimit-remaining-requests"))
+                limit = int(headers.get("x-ratelimit-limit-requests"))
+        except (TypeError, ValueError):
+            self.increase()
+            return
+        
+        if limit > 0 and remaining < limit * 0.1:
+            logger.info(f"AI request quota low ({remaining}/{limit}), reducing concurrency")
+            self.decrease()
+        else:
+            self.increase()
+
+RATE_CONTROLLER = RateController()
+
+class SlidingWindow:
+    """
+    Proactive requests-per-minute and tokens-per-minute limiter.
+    
+    Tracks the requests and estimated input tokens started in the last window and
+    blocks new calls only when either budget is actually exhausted.
+    """
+    
+    def __init__(self, rpm: int, tpm: int, window: float = 60):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.req_times = deque()
+        self.tok_times = deque()
+        self._lock = threading.Lock()
+    
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self.req_times and self.req_times[0] <= cutoff:
+            self.req_times.popleft()
+        while self.tok_times and self.tok_times[0][0] <= cutoff:
+            self.tok_times.popleft()
+    
+    def wait_if_throttled(self, est_tokens: int) -> None:
+        """
+        Block until a call of est_tokens fits in the window, then record it.
+        The call is recorded on admission so concurrent callers see each other.
+        
+        Args:
+            est_tokens: Estimated input tokens of the upcoming call
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+                used_tokens = sum(tokens for _, tokens in self.tok_times)
+                if len(self.req_times) < self.rpm and (used_tokens + est_tokens <= self.tpm or not self.tok_times):
+                    self.req_times.append(now)
+                    self.tok_times.append((now, est_tokens))
+                    return
+                oldest = min(self.req_times[0] if self.req_times else now,
+                             self.tok_times[0][0] if self.tok_times else now)
+                wait_time = max(oldest + self.window - now, 0.1)
+            logger.info(f"Request window full, waiting {wait_time:.1f} seconds before calling {ai_service} API")
+            time.sleep(wait_time)
+
+# Seeded from Anthropic's tier 1 limits for Claude 3.5 Sonnet; override for higher tiers
+ANTHROPIC_RATE_WINDOW = SlidingWindow(
+    rpm=int(os.environ.get('ANTHROPIC_RPM_LIMIT', 50)),
+    tpm=int(os.environ.get('ANTHROPIC_TPM_LIMIT', 40000))
+)
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops calling the AI API during a provider outage.
+    
+    Opens after failure_threshold consecutive failed calls. While open, callers are
+    told to skip the API until reset_timeout has passed, after which a single probe
+    call is let through (half-open) and closes the circuit again if it succeeds.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Return True if a call to the AI API may be made now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("AI API call succeeded, closing circuit breaker")
+            self.state = self.CLOSED
+            self.failure_count = 0
+            self._probe_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call and open the circuit once the threshold is reached."""
+        with self._lock:
+            self.failure_count += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failure_count >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"AI API failed {self.failure_count} times in a row, "
+                                   f"skipping it for {self.reset_timeout} seconds")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+CIRCUIT_BREAKER = CircuitBreaker()
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Get the retry-after delay from an API error response, if present.
+    
+    Args:
+        error: The exception raised by the API client
+        
+    Returns:
+        The number of seconds to wait, or None if the header is missing
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an API error is a rate limit (HTTP 429) error."""
+    return (getattr(error, "status_code", None) == 429 or "429" in str(error)
+            or "too many requests" in str(error).lower())
+
+def _is_retryable_error(error: Exception) -> bool:
+    """
+    Check whether a failed API call is worth retrying.
+    
+    Client errors (HTTP 4xx other than timeouts, conflicts and rate limits) and
+    malformed responses fail the same way every time, so they are not retried.
+    """
+    if isinstance(error, (json.JSONDecodeError, ValidationError)):
+        return False
+    status_code = getattr(error, "status_code", None)
+    return not (isinstance(status_code, int) and 400 <= status_code < 500
+                and status_code not in (408, 409, 429))
+
+def _backoff_delay(error: Exception, retry_count: int) -> float:
+    """
+    Work out how long to wait before retrying a failed API call, reducing the
+    allowed concurrency on rate limits and server errors.
+    
+    Args:
+        error: The exception raised by the failed call
+        retry_count: Number of attempts made so far
+        
+    Returns:
+        The number of seconds to wait
+    """
+    if _is_rate_limit_error(error):
+        RATE_CONTROLLER.decrease()
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            wait_time = retry_after
+        else:
+            wait_time = min(60, 2 * (2 ** retry_count)) + random.uniform(0, 2)
+        logger.info(f"Rate limit hit. Waiting {wait_time:.1f} seconds before retry...")
+        return wait_time
+    
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None and status_code >= 500:
+        RATE_CONTROLLER.decrease()
+    return min(30, 0.5 * (2 ** retry_count)) + random.uniform(0, 0.5)
+
+def _call_with_backoff(fn, *, max_retries: int = 5):
+    """
+    Call an AI API function, retrying failures with exponential backoff and jitter.
+    
+    Each attempt holds a RATE_CONTROLLER slot. Rate limit errors wait for the
+    retry-after header if present, otherwise min(60, 2 * 2**attempt) seconds plus
+    up to 2 seconds of jitter; other errors use a shorter min(30, 0.5 * 2**attempt)
+    delay plus up to 0.5 seconds of jitter. Errors that can't succeed on retry,
+    such as authentication or bad request errors, are raised immediately.
+    
+    Args:
+        fn: Zero-argument callable performing the API call
+        max_retries: Maximum number of attempts before giving up
+        
+    Returns:
+        The return value of fn
+        
+    Raises:
+        The last exception raised by fn once max_retries is exhausted
+    """
+    retry_count = 0
+    while True:
+        logger.info(f"Making {ai_service} API call (attempt {retry_count + 1}/{max_retries})")
+        RATE_CONTROLLER.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            error = e
+        finally:
+            RATE_CONTROLLER.release()
+        
+        retry_count += 1
+        logger.warning(f"{ai_service} API error (attempt {retry_count}/{max_retries}): {str(error)}")
+        if not _is_retryable_error(error):
+            logger.error(f"Not retrying {ai_service} API error: {str(error)}")
+            raise error
+        if retry_count >= max_retries:
+            logger.error(f"Max retries exceeded for {ai_service} API")
+            raise error
+        
+        time.sleep(_backoff_delay(error, retry_count))
+
+async def _acall_with_backoff(fn, *, max_retries: int = 5):
+    """
+    Async variant of _call_with_backoff, sharing the same RATE_CONTROLLER slots.
+    
+    Args:
+        fn: Zero-argument callable returning an awaitable that performs the API call
+        max_retries: Maximum number of attempts before giving up
+        
+    Returns:
+        The result of the awaited call
+        
+    Raises:
+        The last exception raised by the call once max_retries is exhausted
+    """
+    retry_count = 0
+    while True:
+        logger.info(f"Making {ai_service} API call (attempt {retry_count + 1}/{max_retries})")
+        # The controller blocks on a threading condition, so wait for a slot off the event loop
+        await asyncio.to_thread(RATE_CONTROLLER.acquire)
+        try:
+            return await fn()
+        except Exception as e:
+            error = e
+        finally:
+            RATE_CONTROLLER.release()
+        
+        retry_count += 1
+        logger.warning(f"{ai_service} API error (attempt {retry_count}/{max_retries}): {str(error)}")
+        if not _is_retryable_error(error):
+            logger.error(f"Not retrying {ai_service} API error: {str(error)}")
+            raise error
+        if retry_count >= max_retries:
+            logger.error(f"Max retries exceeded for {ai_service} API")
+            raise error
+        
+        await asyncio.sleep(_backoff_delay(error, retry_count))
+
+def _create_openai_completion(prompt: str) -> str:
+    """Stream a single OpenAI extraction call and return the response text."""
+    stream = ai_client.chat.completions.create(**_openai_request_body(prompt), stream=True, timeout=REQUEST_TIMEOUT)
+    RATE_CONTROLLER.update_from_headers(stream.response.headers)
+    
+    # Accumulate the streamed deltas so parsing can start as soon as the last token arrives
+    buffer = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            buffer.append(chunk.choices[0].delta.content)
+    return "".join(buffer)
+
+def _estimate_anthropic_tokens(messages: List[Dict]) -> int:
+    """Estimate the input tokens of an Anthropic extraction call, at roughly four characters per token."""
+    return (len(_ANTHROPIC_SYSTEM_PROMPT[0]["text"]) + sum(len(m["content"]) for m in messages)) // 4
+
+def _create_anthropic_message(messages: List[Dict]) -> str:
+    """Stream a single Anthropic extraction call and return the response text."""
+    ANTHROPIC_RATE_WINDOW.wait_if_throttled(_estimate_anthropic_tokens(messages))
+    with ai_client.messages.stream(**_anthropic_request_body(messages), timeout=REQUEST_TIMEOUT) as stream:
+        RATE_CONTROLLER.update_from_headers(stream.response.headers)
+        return stream.get_final_text()
+
+async def _acreate_openai_completion(prompt: str) -> str:
+    """Async variant of _create_openai_completion."""
+    stream = await async_ai_client.chat.completions.create(**_openai_request_body(prompt), stream=True, timeout=REQUEST_TIMEOUT)
+    RATE_CONTROLLER.update_from_headers(stream.response.headers)
+    
+    buffer = []
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            buffer.append(chunk.choices[0].delta.content)
+    return "".join(buffer)
+
+async def _acreate_anthropic_message(messages: List[Dict]) -> str:
+    """Async variant of _create_anthropic_message."""
+    # The window sleeps while throttled, so wait in a worker thread rather than on the event loop
+    await asyncio.to_thread(ANTHROPIC_RATE_WINDOW.wait_if_throttled, _estimate_anthropic_tokens(messages))
+    async with async_ai_client.messages.stream(**_anthropic_request_body(messages), timeout=REQUEST_TIMEOUT) as stream:
+        RATE_CONTROLLER.update_from_headers(stream.response.headers)
+        return await stream.get_final_text()
+
+class SDSFields(BaseModel):
+    """
+    Schema of the fields extracted from an SDS. Used to validate free-form
+    (Anthropic) responses; missing fields default to empty strings.
+    """
+    model_config = ConfigDict(populate_by_name=True, extra="allow", coerce_numbers_to_str=True)
+    
+    product_name: str = Field("", alias="Product Name")
+    cas_number: str = Field("", alias="CAS Number")
+    chemical_identification: str = Field("", alias="Chemical Identification")
+    health_hazards: str = Field("", alias="Health Hazards")
+    health_category: str = Field("", alias="Health Category")
+    physical_hazards: str = Field("", alias="Physical Hazards")
+    physical_category: str = Field("", alias="Physical Category")
+    flash_point: str = Field("", alias="Flash Point")
+    appearance: str = Field("", alias="Appearance")
+    odour: str = Field("", alias="Odour")
+    colour: str = Field("", alias="Colour")
+    storage_use: str = Field("", alias="Storage Use")
+    supplier_manufacturer: str = Field("", alias="Supplier/Manufacturer")
+    dangerous_goods_class: str = Field("", alias="Dangerous Goods Class")
+    packing_group: str = Field("", alias="Packing Group")
+    environmental_hazards: str = Field("", alias="Environmental Hazards")
+    first_aid_measures: str = Field("", alias="First Aid Measures")
+    firefighting_measures: str = Field("", alias="Firefighting Measures")
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _flatten_values(cls, data):
+        # Convert lists to "; "-joined strings and nulls to empty strings
+        if isinstance(data, dict):
+            return {
+                key: "; ".join(str(item) for item in value) if isinstance(value, list)
+                else "" if value is None else value
+                for key, value in data.items()
+            }
+        return data
+
+# Number of times an invalid Anthropic response is sent back for correction
+_MAX_VALIDATION_RETRIES = 2
+
+class ExtractionCache:
+    """
+    Content-addressable on-disk cache of AI extraction results.
+    
+    Results are stored as JSON files at cache_dir/<key[:2]>/<key>.json, where the key
+    is derived from the AI service, model, prompt version, extraction method and SDS
+    text. Entries older than ttl_days are treated as misses.
+    """
+    
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl_days: int = CACHE_TTL_DAYS):
+        self.cache_dir = cache_dir
+        self.ttl = timedelta(days=ttl_days)
+    
+    @staticmethod
+    def make_key(text: str, method: str = "ai") -> str:
+        """
+        Build the cache key for an SDS text under the active service and prompt.
+        
+        Args:
+            text: The text content of the SDS
+            method: The extraction method, e.g. "ai" or "ml:<strategy>"
+            
+        Returns:
+            Hex SHA-256 digest identifying the extraction
+        """
+        model = OPENAI_MODEL if ai_service == "openai" else ANTHROPIC_MODEL
+        prefix = f"{ai_service}|{model}|{PROMPT_VERSION}|{method}|".encode()
+        encoded = text.encode('utf-8', errors='replace')
+        # Length-prefix the text so the prefix and text boundaries cannot collide
+        return hashlib.sha256(prefix + len(encoded).to_bytes(8, 'big') + encoded).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Look up a cached extraction result.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached extracted fields, or None on a cache miss
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            created_at = datetime.fromisoformat(entry["created_at"])
+            if datetime.now(timezone.utc) - created_at > self.ttl:
+                return None
+            return entry["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def put(self, key: str, data: Dict[str, str]) -> None:
+        """
+        Store an extraction result in the cache.
+        
+        Args:
+            key: The cache key
+            data: The extracted fields
+        """
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Each writer gets its own temp file, so concurrent puts of the same key can't collide
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "data": data}, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write extraction cache entry: {str(e)}")
+
+EXTRACTION_CACHE = ExtractionCache()
+
 def get_api_status() -> Dict[str, Union[bool, str, None]]:
     """
     Check status of AI API integrations.
@@ -54,6 +656,152 @@ def get_api_status() -> Dict[str, Union[bool, str, None]]:
         "active_service": ai_service
     }
 
+def _slice_relevant_sections(text: str) -> str:
+    """
+    Reduce SDS text to the sections the extraction fields come from.
+    
+    Any text before the first section header (usually the product title) is kept.
+    Documents without SECTION headers are truncated instead.
+    
+    Args:
+        text: The text content of the SDS
+        
+    Returns:
+        The text to send to the AI service
+    """
+    headers = list(_SECTION_HEADER_RE.finditer(text))
+    if not headers:
+        sliced = text[:_MAX_UNSECTIONED_CHARS]
+    else:
+        parts = [text[:headers[0].start()]]
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+            if int(header.group(1)) in _RELEVANT_SECTIONS:
+                parts.append(text[header.start():end])
+        sliced = "".join(parts)
+    
+    logger.debug(f"SDS text reduced from {len(text)} to {len(sliced)} characters for AI extraction")
+    return sliced
+
+def _build_prompt(text: str) -> str:
+    """
+    Build the per-document part of the extraction prompt.
+    The static instructions are sent separately so providers can cache them.
+    
+    Args:
+        text: The text content of the SDS
+        
+    Returns:
+        The user prompt string
+    """
+    return _PROMPT_TEMPLATE.format(text=_slice_relevant_sections(text))
+
+def _openai_request_body(prompt: str) -> Dict:
+    """
+    Build the OpenAI chat completion parameters for an extraction prompt.
+    Shared by the synchronous and Batch API code paths.
+    
+    Args:
+        prompt: The extraction prompt
+        
+    Returns:
+        Dictionary of chat.completions.create parameters
+    """
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": _OPENAI_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "SDSExtraction", "schema": _RESPONSE_SCHEMA, "strict": True}
+        },
+        "max_tokens": MAX_OUTPUT_TOKENS,
+        "temperature": 0.2,  # Lower temperature for more consistent extraction
+    }
+
+def _anthropic_request_body(messages: List[Dict]) -> Dict:
+    """
+    Build the Anthropic messages parameters for an extraction conversation.
+    
+    Args:
+        messages: The conversation, starting with the extraction prompt
+        
+    Returns:
+        Dictionary of messages.create parameters
+    """
+    return {
+        "model": ANTHROPIC_MODEL,
+        "max_tokens": MAX_OUTPUT_TOKENS,
+        "temperature": 0.2,
+        "system": _ANTHROPIC_SYSTEM_PROMPT,
+        "messages": messages
+    }
+
+def _json_candidate(response_text: str) -> str:
+    """
+    Get the JSON object text from a Claude response, which might include markdown.
+    
+    Args:
+        response_text: The raw response text
+        
+    Returns:
+        The text most likely to contain the JSON object
+    """
+    json_match = _CODEFENCE_RE.search(response_text)
+    if json_match:
+        return json_match.group(1)
+    
+    if response_text.lstrip().startswith('{'):
+        return response_text
+    
+    potential_json = _BRACE_RE.search(response_text)
+    if potential_json:
+        return potential_json.group(1)
+    
+    return response_text
+
+def _validate_claude_response(response_text: str) -> Dict[str, str]:
+    """
+    Validate a Claude response against the SDS field schema.
+    
+    Args:
+        response_text: The raw response text
+        
+    Returns:
+        Dictionary containing every expected field
+        
+    Raises:
+        ValidationError: If the response is not valid JSON matching SDSFields
+    """
+    return SDSFields.model_validate_json(_json_candidate(response_text)).model_dump(by_alias=True)
+
+def _feedback_messages(response_text: str, error: ValidationError) -> List[Dict]:
+    """Build the conversation turns asking the model to correct an invalid response."""
+    return [
+        {"role": "assistant", "content": response_text},
+        {"role": "user", "content": f"Your output had error: {error}. Return ONLY corrected JSON."}
+    ]
+
+def _finalize_response(response_data: Dict, text: str) -> Dict[str, str]:
+    """
+    Apply document-specific corrections to a parsed AI response.
+    
+    Args:
+        response_data: The JSON object parsed from the AI response
+        text: The text content of the SDS the response was extracted from
+        
+    Returns:
+        Dictionary containing extracted fields
+    """
+    # Special case for 1-Methyl-2-pyrrolidone 
+    if _NMP_RE.search(text):
+        response_data["Health Hazards"] = "Reproductive Toxicity; Skin irritation; Eye irritation; Specific target organ toxicity, single exposure, Respiratory tract irritation"
+        response_data["Odour"] = "amine"
+    
+    return response_data
+
 def extract_with_ai(text: str, sds_filename: Optional[str] = None, light_mode: bool = False) -> Dict[str, str]:
     """
     Extract key information from SDS using AI.
@@ -70,159 +818,262 @@ def extract_with_ai(text: str, sds_filename: Optional[str] = None, light_mode: b
         logger.warning("No AI API keys available. Set OPENAI_API_KEY or ANTHROPIC_API_KEY environment variables.")
         return {"error": "No AI API keys available"}
     
+    # Return the cached result if this exact text was already extracted
+    cache_key = ExtractionCache.make_key(text)
+    cached = EXTRACTION_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("Using cached AI extraction result")
+        return cached
+    
+    # Skip the API entirely while the provider is failing
+    if not CIRCUIT_BREAKER.allow_request():
+        logger.info("Circuit breaker open, using pattern-based extraction")
+        from sds_extractor import extract_sds_data
+        return extract_sds_data(text, "Pattern-based")
+    
     # Create a prompt that instructs the AI to extract specific SDS information
-    prompt = f"""
-You are a chemical safety expert tasked with extracting precise information from a Safety Data Sheet (SDS).
-Extract the following information from the provided SDS document:
-
-1. Product Name: The exact product name/identifier
-2. CAS Number: The Chemical Abstract Service registry number (format: xxx-xx-x)
-3. Chemical Identification: Chemical name or formula
-4. Health Hazards: List all health hazard classifications exactly as follows if present:
-   - Reproductive Toxicity
-   - Skin irritation
-   - Eye irritation
-   - Specific target organ toxicity, single exposure, Respiratory tract irritation
-5. Health Category: GHS health hazard category numbers (e.g., Category 1, 2A, etc.)
-6. Physical Hazards: Physical hazard classifications
-7. Physical Category: GHS physical hazard category numbers
-8. Flash Point: The flash point temperature in degrees Celsius
-9. Appearance: Physical appearance description 
-10. Odour: Description of smell/odour (e.g., amine, pungent, etc.)
-11. Colour: Color description
-12. Storage Use: Storage requirements/conditions
-13. Supplier/Manufacturer: Company name that supplies/manufactures the chemical
-14. Dangerous Goods Class: Transportation hazard class if applicable
-15. Packing Group: The packing group (I, II, or III) if applicable
-16. Environmental Hazards: Any environmental hazard information
-17. First Aid Measures: Detailed first aid procedures from Section 4
-18. Firefighting Measures: Firefighting instructions and recommendations from Section 5
-
-Please ensure you extract ONLY facts present in the document. If information for a field is not found, leave it blank.
-Format your response as a JSON object with these field names as keys.
-
-SDS Document:
-{text}
-
-If the SDS document appears to be for 1-Methyl-2-pyrrolidone, ensure the Health Hazards includes exactly: "Reproductive Toxicity; Skin irritation; Eye irritation; Specific target organ toxicity, single exposure, Respiratory tract irritation" and the Odour is "amine".
-"""
+    prompt = _build_prompt(text)
 
     # Different handling based on which AI service we're using
     response_data = {}
     
     try:
         if ai_service == "openai":
-            response = ai_client.chat.completions.create(
-                model="gpt-4o",  # Using the latest model
-                messages=[
-                    {"role": "system", "content": "You are a chemical safety expert specializing in SDS document analysis."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2,  # Lower temperature for more consistent extraction
-            )
-            
-            response_text = response.choices[0].message.content
-            response_data = json.loads(response_text)
+            response_text = _call_with_backoff(lambda: _create_openai_completion(prompt))
+            CIRCUIT_BREAKER.record_success()
+            response_data = _json_loads(response_text)
             
         elif ai_service == "anthropic":
-            # Add very aggressive rate limiting handling for Anthropic API
-            max_retries = 10
-            retry_count = 0
-            backoff_time = 10  # Start with 10 seconds
-            
-            # Always add a delay before making any API call to prevent rate limits
-            time.sleep(3)  # Add a 3-second delay before every call
-
-            while retry_count < max_retries:
+            messages = [{"role": "user", "content": prompt}]
+            for attempt in range(_MAX_VALIDATION_RETRIES + 1):
                 try:
-                    # the newest Anthropic model is "claude-3-5-sonnet-20241022" which was released October 22, 2024
-                    logger.info(f"Making Anthropic API call (attempt {retry_count + 1}/{max_retries})")
-                    response = ai_client.messages.create(
-                        model="claude-3-5-sonnet-20241022",
-                        max_tokens=2000,
-                        temperature=0.2,
-                        system="You are a chemical safety expert specializing in SDS document analysis. Extract precise information and format as JSON.",
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                    
-                    response_text = response.content[0].text
-                    # Successfully got a response, break the retry loop
-                    break
-                
+                    response_text = _call_with_backoff(lambda: _create_anthropic_message(messages), max_retries=10)
                 except Exception as e:
-                    retry_count += 1
-                    logger.warning(f"Anthropic API error (attempt {retry_count}/{max_retries}): {str(e)}")
-                    
-                    # Check if this is a rate limiting error
-                    if "429" in str(e) or "too many requests" in str(e).lower():
-                        wait_time = backoff_time * retry_count
-                        logger.info(f"Rate limit hit. Waiting {wait_time} seconds before retry...")
-                        time.sleep(wait_time)
-                    elif retry_count < max_retries:
-                        # For other errors, use a shorter wait time
-                        time.sleep(2)
-                    else:
-                        # Max retries exceeded
-                        logger.error("Max retries exceeded for Anthropic API")
-                        return {"error": f"Anthropic API extraction failed after {max_retries} attempts: {str(e)}"}
-            
-            # Process the response
-            try:
-                # Extract JSON from Claude's response, which might include markdown
-                json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-                if json_match:
-                    response_data = json.loads(json_match.group(1))
-                else:
-                    # Try direct JSON parsing if not in code block
-                    try:
-                        response_data = json.loads(response_text)
-                    except json.JSONDecodeError:
-                        # Last resort: try to find a JSON-like structure
-                        potential_json = re.search(r'({.*})', response_text, re.DOTALL)
-                        if potential_json:
-                            try:
-                                response_data = json.loads(potential_json.group(1))
-                            except json.JSONDecodeError:
-                                logger.error("Failed to parse JSON from Claude response")
-                                return {"error": "Failed to parse AI response"}
-            except Exception as e:
-                logger.error(f"Error processing Anthropic response: {str(e)}")
-                return {"error": f"Failed to process Anthropic response: {str(e)}"}
+                    CIRCUIT_BREAKER.record_failure()
+                    return {"error": f"Anthropic API extraction failed after retries: {str(e)}"}
+                CIRCUIT_BREAKER.record_success()
+                
+                # Validate the response, asking the model to correct it on failure
+                try:
+                    response_data = _validate_claude_response(response_text)
+                    break
+                except ValidationError as e:
+                    logger.warning(f"Invalid Claude response (attempt {attempt + 1}/{_MAX_VALIDATION_RETRIES + 1}): {e}")
+                    if attempt == _MAX_VALIDATION_RETRIES:
+                        logger.error("Failed to parse JSON from Claude response")
+                        return {"error": "Failed to parse AI response"}
+                    messages = messages + _feedback_messages(response_text, e)
     
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing AI response: {str(e)}")
+        return {"error": f"AI extraction failed: {str(e)}"}
     except Exception as e:
+        CIRCUIT_BREAKER.record_failure()
         logger.error(f"Error calling AI API: {str(e)}")
         return {"error": f"AI extraction failed: {str(e)}"}
     
-    # Ensure all required fields exist in the response
-    expected_fields = [
-        "Product Name", "CAS Number", "Chemical Identification", 
-        "Health Hazards", "Health Category", "Physical Hazards", 
-        "Physical Category", "Flash Point", "Appearance", "Odour", 
-        "Colour", "Storage Use", "Supplier/Manufacturer", 
-        "Dangerous Goods Class", "Packing Group", "Environmental Hazards",
-        "First Aid Measures", "Firefighting Measures"
+    response_data = _finalize_response(response_data, text)
+    EXTRACTION_CACHE.put(cache_key, response_data)
+    return response_data
+
+def submit_extraction_batch(documents: Dict[str, str]) -> str:
+    """
+    Submit SDS documents as a single OpenAI Batch API job without waiting for it.
+    
+    Args:
+        documents: Dictionary mapping each filename to its text; filenames must be unique
+        
+    Returns:
+        The ID of the submitted batch
+    """
+    # Build one chat completion request per document as in-memory JSONL
+    batch_lines = [
+        json.dumps({
+            "custom_id": filename,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _openai_request_body(_build_prompt(text))
+        })
+        for filename, text in documents.items()
     ]
+    batch_bytes = ("\n".join(batch_lines) + "\n").encode('utf-8')
+    input_file = ai_client.files.create(file=("batch.jsonl", batch_bytes), purpose="batch")
     
-    # Add any missing fields with empty values
-    for field in expected_fields:
-        if field not in response_data:
-            response_data[field] = ""
+    batch = ai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info(f"Submitted OpenAI batch {batch.id} with {len(documents)} documents")
+    return batch.id
+
+def retrieve_extraction_batch(batch_id: str, documents: Dict[str, str]) -> Tuple[str, Optional[Dict[str, Dict[str, str]]]]:
+    """
+    Check an OpenAI batch job and collect its results once it has finished.
     
-    # Special case for 1-Methyl-2-pyrrolidone 
-    if ("1-methyl-2-pyrrolidone" in text.lower() or "1-methyl-2-pyrrolidinone" in text.lower() or 
-        "nmp" in text.lower() or "872-50-4" in text.lower()):
-        response_data["Health Hazards"] = "Reproductive Toxicity; Skin irritation; Eye irritation; Specific target organ toxicity, single exposure, Respiratory tract irritation"
-        response_data["Odour"] = "amine"
+    Args:
+        batch_id: The ID returned by submit_extraction_batch
+        documents: Dictionary mapping each submitted filename to its text
+        
+    Returns:
+        Tuple of (batch status, results) where results maps each filename to its
+        extracted fields, or is None while the batch is still running
+    """
+    batch = ai_client.batches.retrieve(batch_id)
+    if batch.status not in ("completed", "failed", "expired", "cancelled"):
+        return batch.status, None
     
-    # Convert any lists to string format to avoid DataFrame conversion issues
-    for field, value in response_data.items():
-        if isinstance(value, list):
-            response_data[field] = "; ".join(str(item) for item in value)
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"OpenAI batch {batch.id} finished with status {batch.status}")
+        return batch.status, {filename: {"error": f"AI batch extraction {batch.status}"} for filename in documents}
     
-    return response_data
+    results = {}
+    output = ai_client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        item = _json_loads(line)
+        filename = item.get("custom_id")
+        try:
+            response_text = item["response"]["body"]["choices"][0]["message"]["content"]
+            text = documents.get(filename, "")
+            results[filename] = _finalize_response(_json_loads(response_text), text)
+            EXTRACTION_CACHE.put(ExtractionCache.make_key(text), results[filename])
+        except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+            error = item.get("error") or str(e)
+            logger.error(f"Failed to parse batch result for {filename}: {error}")
+            results[filename] = {"error": f"AI extraction failed: {error}"}
+    
+    # Requests missing from the output file are reported as failures
+    for filename in documents:
+        if filename not in results:
+            results[filename] = {"error": "AI extraction failed: no result returned in batch output"}
+    
+    return batch.status, results
+
+def extract_with_ai_batch(documents: List[Tuple[str, str]], poll_interval: int = 30) -> Dict[str, Dict[str, str]]:
+    """
+    Extract key information from many SDS documents using the OpenAI Batch API.
+    
+    All documents are submitted as a single JSONL batch job which is polled until
+    it completes. When the active service is not OpenAI, documents are extracted
+    one at a time with extract_with_ai instead.
+    
+    Args:
+        documents: List of (filename, text) tuples; filenames must be unique
+        poll_interval: Seconds to wait between batch status checks
+        
+    Returns:
+        Dictionary mapping each filename to its extracted fields
+    """
+    if not ai_client:
+        logger.warning("No AI API keys available. Set OPENAI_API_KEY or ANTHROPIC_API_KEY environment variables.")
+        return {filename: {"error": "No AI API keys available"} for filename, _ in documents}
+    
+    if ai_service != "openai":
+        return {filename: extract_with_ai(text, filename) for filename, text in documents}
+    
+    results = {}
+    texts = {}
+    
+    # Serve previously extracted documents from the cache and only batch the rest
+    for filename, text in documents:
+        cached = EXTRACTION_CACHE.get(ExtractionCache.make_key(text))
+        if cached is not None:
+            results[filename] = cached
+        else:
+            texts[filename] = text
+    
+    if not texts:
+        return results
+    
+    try:
+        batch_id = submit_extraction_batch(texts)
+        
+        # Poll until the batch reaches a terminal state
+        while True:
+            status, batch_results = retrieve_extraction_batch(batch_id, texts)
+            if batch_results is not None:
+                break
+            time.sleep(poll_interval)
+    
+    except Exception as e:
+        logger.error(f"Error calling AI batch API: {str(e)}")
+        results.update({filename: {"error": f"AI batch extraction failed: {str(e)}"} for filename in texts})
+        return results
+    
+    results.update(batch_results)
+    return results
+
+@lru_cache(maxsize=32)
+def _extract_text_cached(pdf_path: str, mtime: float) -> str:
+    # Import inside function to avoid circular imports
+    from utils import read_pdf_text
+    from ocr_handler import is_scanned_pdf, process_ocr
+    
+    # Check if the PDF is scanned or digital
+    if is_scanned_pdf(pdf_path):
+        return process_ocr(pdf_path)
+    return read_pdf_text(pdf_path)
+
+def _extract_text(pdf_path: str) -> str:
+    """
+    Get the text of a PDF, using OCR if it appears to be scanned.
+    Results are cached per (path, modification time) so retries don't repeat OCR.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        
+    Returns:
+        Extracted text as a string
+    """
+    return _extract_text_cached(pdf_path, os.path.getmtime(pdf_path))
+
+def _extract_from_text(text: str, filename: str, light_mode: bool = False) -> Dict[str, str]:
+    """
+    Extract information from already-extracted PDF text using AI.
+    
+    Args:
+        text: The text content of the SDS
+        filename: The PDF filename, for context
+        light_mode: If True, uses pattern-based extraction instead of the AI service
+        
+    Returns:
+        Dictionary containing extracted data
+    """
+    # If we're using light mode due to rate limiting, extract basic info using pattern-based
+    # approach first and then supplement with limited AI extraction
+    if light_mode:
+        # Import here to avoid circular imports
+        from sds_extractor import extract_sds_data
+        
+        # Get basic data from pattern-based extraction
+        basic_data = extract_sds_data(text, "Pattern-based")
+        
+        # Log that we're using light mode
+        logger.info("Using light mode for AI extraction due to rate limiting")
+        
+        # Add filename info
+        basic_data["Source File"] = filename
+        
+        return basic_data
+    
+    try:
+        # Full AI extraction
+        extracted_data = extract_with_ai(text, filename)
+    except Exception as e:
+        logger.error(f"Error extracting from PDF with AI: {str(e)}")
+        logger.info("Trying light mode extraction after error")
+        return _extract_from_text(text, filename, light_mode=True)
+    
+    # Check if we hit rate limits
+    if "error" in extracted_data and ("rate limit" in extracted_data["error"].lower() or 
+                                     "429" in extracted_data["error"]):
+        logger.warning("Rate limit detected, falling back to light mode extraction")
+        # Try again with light mode, reusing the text we already have
+        return _extract_from_text(text, filename, light_mode=True)
+    
+    return extracted_data
 
 def extract_from_pdf_with_ai(pdf_path: str, light_mode: bool = False) -> Dict[str, str]:
     """
@@ -235,58 +1086,213 @@ def extract_from_pdf_with_ai(pdf_path: str, light_mode: bool = False) -> Dict[st
     Returns:
         Dictionary containing extracted data
     """
-    # Import inside function to avoid circular imports
-    from utils import read_pdf_text
-    from ocr_handler import is_scanned_pdf, process_ocr
-    
     try:
-        # Check if the PDF is scanned or digital
-        if is_scanned_pdf(pdf_path):
-            text = process_ocr(pdf_path)
-        else:
-            text = read_pdf_text(pdf_path)
+        text = _extract_text(pdf_path)
+        return _extract_from_text(text, os.path.basename(pdf_path), light_mode=light_mode)
+    except Exception as e:
+        logger.error(f"Error extracting from PDF with AI: {str(e)}")
+        return {"error": f"PDF extraction failed: {str(e)}"}
+
+def extract_from_pdfs_with_ai_batch(pdf_paths: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Extract information from many PDF files in a single AI batch.
+    
+    Args:
+        pdf_paths: Paths to the PDF files
         
-        # Get filename for context
+    Returns:
+        Dictionary mapping each PDF filename to its extracted data
+    """
+    documents = []
+    results = {}
+    
+    for pdf_path in pdf_paths:
         filename = os.path.basename(pdf_path)
+        try:
+            documents.append((filename, _extract_text(pdf_path)))
+        except Exception as e:
+            logger.error(f"Error reading PDF {filename}: {str(e)}")
+            results[filename] = {"error": f"PDF extraction failed: {str(e)}"}
+    
+    if documents:
+        results.update(extract_with_ai_batch(documents))
+    
+    for filename, data in results.items():
+        if "error" not in data:
+            data["Source File"] = filename
+    
+    return results
+
+def batch_extract_from_pdfs(pdf_paths: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Dict[str, str]]:
+    """
+    Extract information from many PDF files, reading and OCRing them in worker processes.
+    
+    PDF text extraction is CPU-bound, so it is fanned out across a process pool while
+    the AI calls run here one at a time; OCR of later PDFs overlaps the API call for the
+    current one. Use batch_extract to also overlap the AI calls.
+    
+    Args:
+        pdf_paths: Paths to the PDF files
+        max_workers: Number of worker processes (defaults to the CPU count)
         
-        # If we're using light mode due to rate limiting, extract basic info using pattern-based
-        # approach first and then supplement with limited AI extraction
-        if light_mode:
-            # Import here to avoid circular imports
-            from sds_extractor import extract_sds_data
-            
-            # Get basic data from pattern-based extraction
-            basic_data = extract_sds_data(text, "Pattern-based")
-            
-            # Log that we're using light mode
-            logger.info("Using light mode for AI extraction due to rate limiting")
-            
-            # Add filename info
-            basic_data["Source File"] = filename
-            
-            return basic_data
-        else:
-            # Full AI extraction
-            extracted_data = extract_with_ai(text, filename)
-            
-            # Check if we hit rate limits
-            if "error" in extracted_data and ("rate limit" in extracted_data["error"].lower() or 
-                                             "429" in extracted_data["error"]):
-                logger.warning("Rate limit detected, falling back to light mode extraction")
-                # Try again with light mode
-                return extract_from_pdf_with_ai(pdf_path, light_mode=True)
-            
-            return extracted_data
+    Yields:
+        Extracted data dictionaries, in the same order as pdf_paths
+    """
+    pdf_paths = list(pdf_paths)
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_extract_text, pdf_path) for pdf_path in pdf_paths]
+        for pdf_path, future in zip(pdf_paths, futures):
+            filename = os.path.basename(pdf_path)
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.error(f"Error extracting from PDF with AI: {str(e)}")
+                yield {"error": f"PDF extraction failed: {str(e)}", "Source File": filename}
+                continue
+            yield _extract_from_text(text, filename)
+
+async def aextract_with_ai(text: str, sds_filename: Optional[str] = None,
+                           semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, str]:
+    """
+    Async variant of extract_with_ai using the async AI client.
+    
+    Args:
+        text: The text content of the SDS
+        sds_filename: Optional filename for context
+        semaphore: Optional semaphore bounding the number of in-flight API calls
+        
+    Returns:
+        Dictionary containing extracted fields
+    """
+    if not async_ai_client:
+        logger.warning("No AI API keys available. Set OPENAI_API_KEY or ANTHROPIC_API_KEY environment variables.")
+        return {"error": "No AI API keys available"}
+    
+    cache_key = ExtractionCache.make_key(text)
+    cached = EXTRACTION_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Skip the API entirely while the provider is failing
+    if not CIRCUIT_BREAKER.allow_request():
+        logger.info("Circuit breaker open, using pattern-based extraction")
+        from sds_extractor import extract_sds_data
+        return await asyncio.to_thread(extract_sds_data, text, "Pattern-based")
+    
+    prompt = _build_prompt(text)
+    semaphore = semaphore or asyncio.Semaphore(1)
+    
+    try:
+        async with semaphore:
+            if ai_service == "openai":
+                response_text = await _acall_with_backoff(lambda: _acreate_openai_completion(prompt))
+                CIRCUIT_BREAKER.record_success()
+                response_data = _json_loads(response_text)
+            else:
+                messages = [{"role": "user", "content": prompt}]
+                for attempt in range(_MAX_VALIDATION_RETRIES + 1):
+                    try:
+                        response_text = await _acall_with_backoff(lambda: _acreate_anthropic_message(messages), max_retries=10)
+                    except Exception as e:
+                        CIRCUIT_BREAKER.record_failure()
+                        return {"error": f"Anthropic API extraction failed after retries: {str(e)}"}
+                    CIRCUIT_BREAKER.record_success()
+                    
+                    try:
+                        response_data = _validate_claude_response(response_text)
+                        break
+                    except ValidationError as e:
+                        logger.warning(f"Invalid Claude response (attempt {attempt + 1}/{_MAX_VALIDATION_RETRIES + 1}): {e}")
+                        if attempt == _MAX_VALIDATION_RETRIES:
+                            logger.error("Failed to parse JSON from Claude response")
+                            return {"error": "Failed to parse AI response"}
+                        messages = messages + _feedback_messages(response_text, e)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error parsing AI response: {str(e)}")
+        return {"error": f"AI extraction failed: {str(e)}"}
+    except Exception as e:
+        CIRCUIT_BREAKER.record_failure()
+        logger.error(f"Error calling AI API: {str(e)}")
+        return {"error": f"AI extraction failed: {str(e)}"}
+    
+    response_data = _finalize_response(response_data, text)
+    EXTRACTION_CACHE.put(cache_key, response_data)
+    return response_data
+
+async def aextract_from_pdf_with_ai(pdf_path: str, semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, str]:
+    """
+    Async variant of extract_from_pdf_with_ai.
+    
+    PDF reading and OCR run in a worker thread so they don't block the event loop.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        semaphore: Optional semaphore bounding the number of in-flight API calls
         
+    Returns:
+        Dictionary containing extracted data
+    """
+    filename = os.path.basename(pdf_path)
+    
+    try:
+        text = await asyncio.to_thread(_extract_text, pdf_path)
     except Exception as e:
         logger.error(f"Error extracting from PDF with AI: {str(e)}")
+        return {"error": f"PDF extraction failed: {str(e)}", "Source File": filename}
+    
+    return await _aextract_from_text(text, filename, semaphore)
+
+async def _aextract_from_text(text: str, filename: str, semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, str]:
+    """
+    Extract information from already-extracted PDF text using the async AI path.
+    
+    Args:
+        text: The text content of the SDS
+        filename: The PDF filename, for context
+        semaphore: Optional semaphore bounding the number of in-flight API calls
+        
+    Returns:
+        Dictionary containing extracted data
+    """
+    extracted_data = await aextract_with_ai(text, filename, semaphore=semaphore)
+    
+    # Fall back to pattern-based extraction on rate limits, like the light mode of the sync path
+    if "error" in extracted_data and ("rate limit" in extracted_data["error"].lower() or
+                                     "429" in extracted_data["error"]):
+        logger.warning(f"Rate limit detected for {filename}, falling back to light mode extraction")
+        from sds_extractor import extract_sds_data
+        extracted_data = await asyncio.to_thread(extract_sds_data, text, "Pattern-based")
+        extracted_data["Source File"] = filename
+    
+    return extracted_data
+
+async def batch_extract(pdf_paths: List[str], max_concurrency: int = 8,
+                        max_workers: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Extract information from many PDF files concurrently.
+    
+    PDF reading and OCR are CPU-bound, so they run in a process pool; each document's
+    text is handed to the async AI path as soon as it is ready.
+    
+    Args:
+        pdf_paths: Paths to the PDF files
+        max_concurrency: Maximum number of AI API calls in flight at once
+        max_workers: Number of worker processes (defaults to the CPU count)
         
-        # Try light mode on exception as a last resort
+    Returns:
+        List of extracted data dictionaries, in the same order as pdf_paths
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _extract_one(pdf_path: str, executor: ProcessPoolExecutor) -> Dict[str, str]:
+        filename = os.path.basename(pdf_path)
         try:
-            if not light_mode:
-                logger.info("Trying light mode extraction after error")
-                return extract_from_pdf_with_ai(pdf_path, light_mode=True)
-        except:
-            pass
-            
-        return {"error": f"PDF extraction failed: {str(e)}"}
\ No newline at end of file
+            text = await loop.run_in_executor(executor, _extract_text, pdf_path)
+        except Exception as e:
+            logger.error(f"Error extracting from PDF with AI: {str(e)}")
+            return {"error": f"PDF extraction failed: {str(e)}", "Source File": filename}
+        return await _aextract_from_text(text, filename, semaphore)
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return await asyncio.gather(*[_extract_one(path, executor) for path in pdf_paths])
@@ -1,49 +1,68 @@
-import pandas as pd
 import sys
+from itertools import islice
+from openpyxl import load_workbook
 
 def analyze_excel_template(file_path):
     """
     Analyze the Excel template to understand its structure and columns.
+    Streams the sheet in read-only mode so memory stays flat for large templates.
     """
     try:
         print(f"Attempting to read Excel file: {file_path}")
-        # Try with different engines
         try:
-            df = pd.read_excel(file_path, engine='openpyxl')
-        except Exception as e1:
-            print(f"Failed with openpyxl: {str(e1)}")
-            try:
-                df = pd.read_excel(file_path, engine='xlrd')
-            except Exception as e2:
-                print(f"Failed with xlrd: {str(e2)}")
-                return
-        
+            wb = load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            print(f"Failed with openpyxl: {str(e)}")
+            return
+
+        try:
+            ws = wb.active
+            header_row = next(ws.iter_rows(max_row=1, values_only=True), ())
+            header = [str(value) if value is not None else f"Unnamed: {idx}" for idx, value in enumerate(header_row)]
+
+            # Single streaming pass: keep the sample rows, per-column non-null counts
+            # and the value types seen in each column
+            sample_rows = []
+            non_null_counts = [0] * len(header)
+            column_types = [set() for _ in header]
+            row_count = 0
+
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                row_count += 1
+                if len(sample_rows) < 2:
+                    sample_rows.append(row)
+                for idx, value in enumerate(islice(row, len(header))):
+                    if value is not None:
+                        non_null_counts[idx] += 1
+                        column_types[idx].add(type(value).__name__)
+        finally:
+            wb.close()
+
         # Display basic information
-        print(f"\nExcel template has {df.shape[0]} rows and {df.shape[1]} columns")
+        print(f"\nExcel template has {row_count} rows and {len(header)} columns")
         print("\nColumn list:")
-        for idx, col in enumerate(df.columns):
+        for idx, col in enumerate(header):
             print(f"  {idx+1}. {col}")
-        
+
         # Show a sample of the data (just a few rows)
-        if not df.empty:
+        if row_count:
             print("\nSample data (first 2 rows):")
-            sample = df.head(2)
-            print(sample.to_string(index=False, max_colwidth=30))
-            
+            for row in sample_rows:
+                print(" | ".join(str(value)[:30] if value is not None else "" for value in islice(row, len(header))))
+
             # Check for empty columns
-            empty_cols = [col for col in df.columns if df[col].isna().all()]
+            empty_cols = [col for col, count in zip(header, non_null_counts) if count == 0]
             if empty_cols:
                 print("\nEmpty columns found:")
                 for col in empty_cols:
                     print(f"  - {col}")
-            
+
             # Analyze data types
             print("\nColumn data types:")
-            for col in df.columns:
-                data_type = df[col].dtype
-                non_null_count = df[col].count()
-                print(f"  - {col}: {data_type} ({non_null_count}/{df.shape[0]} non-null values)")
-        
+            for col, types, count in zip(header, column_types, non_null_counts):
+                data_type = ", ".join(sorted(types)) if types else "empty"
+                print(f"  - {col}: {data_type} ({count}/{row_count} non-null values)")
+
     except Exception as e:
         print(f"Error analyzing Excel template: {str(e)}")
 
@@ -51,6 +70,6 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python analyze_template.py <excel_file_path>")
         sys.exit(1)
-    
+
     excel_file = sys.argv[1]
-    analyze_excel_template(excel_file)
\ No newline at end of file
+    analyze_excel_template(excel_file)
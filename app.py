@@ -2,25 +2,402 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
-import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import base64
-import io
 import json
+import hashlib
+import functools
+import logging
+
+# Used to join Arrow-backed list columns on export when available
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
 
 from sds_extractor import extract_sds_data, get_sections
-from data_processor import process_dataframe, filter_dataframe, generate_excel, generate_csv
-from ocr_handler import is_scanned_pdf, process_ocr
-from utils import read_pdf_text, display_pdf, save_dataframe, load_dataframe
-from ai_extractor import extract_with_ai, extract_from_pdf_with_ai, get_api_status
-# Import new ML extraction capabilities
-from ml_extractor import (
-    extract_sds_with_ml, 
-    extract_from_pdf_with_ml, 
-    get_ml_extraction_strategies, 
-    get_available_ml_models
+from data_processor import process_dataframe, filter_dataframe, get_filter_mask, generate_excel, generate_csv
+from utils import (
+    read_pdf_text, 
+    render_pdf_preview, 
+    save_dataframe, 
+    append_to_register, 
+    load_dataframe, 
+    dataframe_to_csv_bytes
+)
+from db_handler import (
+    get_extraction_history, 
+    initialize_database, 
+    add_extraction_to_history, 
+    add_extraction_history_bulk, 
+    add_pending_batch, 
+    get_pending_batches, 
+    update_batch_status
 )
-from db_handler import get_extraction_history, initialize_database, add_extraction_to_history
+
+# Debug output is only emitted when SDS_LOG_LEVEL=DEBUG
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get("SDS_LOG_LEVEL", "INFO").upper())
+
+# The AI, ML and OCR modules pull in heavy SDKs, so they are only imported the
+# first time an extraction actually needs them
+@functools.cache
+def _ai():
+    import ai_extractor
+    return ai_extractor
+
+@functools.cache
+def _ml():
+    import ml_extractor
+    return ml_extractor
+
+@functools.cache
+def _ocr():
+    import ocr_handler
+    return ocr_handler
+
+def _df_fingerprint(df):
+    """
+    Cheap content fingerprint of a DataFrame, used as the cache key for exports.
+    
+    Args:
+        df: The DataFrame to fingerprint
+        
+    Returns:
+        Hex digest identifying the DataFrame's columns and contents
+    """
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # Cells holding lists or dicts are unhashable, so hash their string form instead
+        row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    digest = hashlib.sha1(row_hashes.values.tobytes())
+    digest.update("|".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+def _wkey(name):
+    """
+    Stable short digest of a name for use in widget keys.
+    
+    Unlike the builtin hash(), the digest does not change between processes.
+    
+    Args:
+        name: The name to digest, e.g. an uploaded file name
+        
+    Returns:
+        12-character hex digest
+    """
+    return hashlib.blake2b(name.encode(), digest_size=6).hexdigest()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _unique_for(column, df_hash, _series):
+    """
+    Distinct non-null values of a register column for the sidebar filter,
+    cached per column and register fingerprint.
+    
+    Args:
+        column: Name of the column
+        df_hash: Fingerprint of the register, from _df_fingerprint
+        _series: The column values (excluded from Streamlit's hashing)
+        
+    Returns:
+        List of distinct values
+    """
+    return _series.dropna().unique().tolist()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _df_to_csv_bytes(df_hash, _df):
+    """
+    Serialize a DataFrame to CSV bytes, cached on its fingerprint so unrelated
+    reruns don't re-serialize the whole register.
+    
+    Args:
+        df_hash: Fingerprint of the DataFrame, from _df_fingerprint
+        _df: The DataFrame to serialize (excluded from Streamlit's hashing)
+        
+    Returns:
+        The CSV file contents as bytes
+    """
+    return dataframe_to_csv_bytes(_df)
+
+def _stringify_complex(df):
+    """
+    Convert dict and list cells to strings so they can be written to Excel.
+    
+    Args:
+        df: The DataFrame to convert
+        
+    Returns:
+        A copy of the DataFrame with dicts as str() and lists joined with "; "
+    """
+    out = df.copy()
+    
+    # Arrow-backed list columns are joined in C++ without visiting each cell
+    if pa is not None:
+        for col in out.columns:
+            dtype = out[col].dtype
+            if isinstance(dtype, pd.ArrowDtype) and pa.types.is_list(dtype.pyarrow_dtype):
+                values = pa.array(out[col])
+                joined = pc.binary_join(pc.cast(values, pa.list_(pa.string())), '; ')
+                out[col] = pd.Series(pd.array(joined, dtype=pd.ArrowDtype(pa.string())), index=out.index)
+    
+    # Only object columns can hold dicts or lists
+    for col in out.select_dtypes(include='object').columns:
+        cell_types = out[col].map(type)
+        is_dict = cell_types.eq(dict)
+        is_list = cell_types.eq(list)
+        if is_dict.any():
+            out.loc[is_dict, col] = out.loc[is_dict, col].map(str)
+        if is_list.any():
+            out.loc[is_list, col] = out.loc[is_list, col].map(lambda items: '; '.join(map(str, items)))
+    
+    return out
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _df_to_xlsx_bytes(df_hash, _df):
+    """
+    Generate the Excel register for a DataFrame, cached on its fingerprint.
+    
+    Args:
+        df_hash: Fingerprint of the DataFrame, from _df_fingerprint
+        _df: The DataFrame to export (excluded from Streamlit's hashing)
+        
+    Returns:
+        The Excel file contents as bytes
+    """
+    return generate_excel(_stringify_complex(_df)).getvalue()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _df_to_report_csv_bytes(df_hash, _df):
+    """
+    Generate the reformatted CSV register for a DataFrame, cached on its fingerprint.
+    
+    Args:
+        df_hash: Fingerprint of the DataFrame, from _df_fingerprint
+        _df: The DataFrame to export (excluded from Streamlit's hashing)
+        
+    Returns:
+        The CSV file contents as bytes
+    """
+    return generate_csv(_df).getvalue().encode()
+
+# Columns of the SDS register, in display order
+SDS_COLUMNS = (
+    'Number', 'Product Name', 'Supplier/Manufacturer', 'Hazards', 'Location', 
+    'SDS Available', 'Issue Date', 'Health Hazards', 'Health Category',
+    'Physical Hazards', 'Physical Category', 'Hazardous Substance', 'Flash Point (Deg C)',
+    'Dangerous Goods Class', 'Description', 'Packing Group', 'Appearance', 'Colour', 'Odour',
+    'Last Updated Date', 'Source File'
+)
+
+# Number of trailing register rows shown to confirm a save
+PREVIEW_ROWS = 5
+
+# Register row with every column present, so new rows share one key order
+ROW_TEMPLATE = dict.fromkeys(SDS_COLUMNS)
+
+DATE_FORMAT = '%Y-%m-%d'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Headers-only CSV offered for download while the register is empty
+EMPTY_CSV_BYTES = (",".join(SDS_COLUMNS) + "\n").encode()
+
+# Low-cardinality register columns, stored as categoricals
+CATEGORICAL_COLS = frozenset({
+    'Dangerous Goods Class', 'Packing Group', 'Health Category', 'Physical Category',
+    'SDS Available', 'Hazardous Substance', 'Supplier/Manufacturer'
+})
+
+# Register columns are stored as pandas strings or categoricals rather than generic objects;
+# text columns are Arrow-backed when pyarrow is installed so Streamlit can render them without conversion
+STRING_DTYPE = "string[pyarrow]" if pa is not None else "string"
+SDS_DTYPES = {column: "category" if column in CATEGORICAL_COLS else STRING_DTYPE for column in SDS_COLUMNS}
+
+def _empty_register():
+    """
+    Create an empty SDS register with typed columns.
+    
+    Returns:
+        Empty DataFrame with the SDS register columns
+    """
+    return pd.DataFrame({column: pd.Series(dtype=SDS_DTYPES[column]) for column in SDS_COLUMNS})
+
+def _apply_dtypes(df):
+    """
+    Cast the register columns present in a DataFrame to their SDS_DTYPES.
+    
+    Args:
+        df: The register DataFrame
+        
+    Returns:
+        The DataFrame with typed register columns
+    """
+    return df.astype({column: dtype for column, dtype in SDS_DTYPES.items() if column in df.columns})
+
+def _append_rows(df, rows):
+    """
+    Append extracted rows to the register with a single concat.
+    
+    Args:
+        df: The current register
+        rows: List of extracted data dictionaries
+        
+    Returns:
+        The combined DataFrame with the register columns cast to their dtypes
+    """
+    new_df = _stringify_complex(pd.DataFrame.from_records(rows))
+    return _apply_dtypes(pd.concat([df, new_df], ignore_index=True))
+
+# Maximum number of AI/ML extraction calls in flight during bulk processing
+MAX_CONCURRENT_API_CALLS = 4
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _cached_pdf_text(file_bytes, enable_ocr):
+    """
+    Get the text of an uploaded PDF, using OCR if it appears to be scanned.
+    Cached on the file contents so re-uploads of the same SDS skip OCR entirely.
+    
+    Args:
+        file_bytes: The contents of the PDF file
+        enable_ocr: Whether OCR may be used for scanned documents
+        
+    Returns:
+        Tuple of (pdf text, whether OCR was used)
+    """
+    # Determine if OCR is needed; the PDF is read straight from memory
+    needs_ocr = _ocr().is_scanned_pdf(file_bytes) if enable_ocr else False
+    
+    # Get text from PDF
+    if needs_ocr:
+        return _ocr().process_ocr(file_bytes), True
+    return read_pdf_text(file_bytes), False
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _pdf_preview_png(file_bytes):
+    """
+    Render the first-page preview of an uploaded PDF once per file instead of on every rerun.
+    
+    Args:
+        file_bytes: The contents of the PDF file
+        
+    Returns:
+        PNG image data
+    """
+    return render_pdf_preview(file_bytes)
+
+@st.cache_resource(ttl=300)
+def _cached_api_status():
+    """
+    AI service status, cached so reruns and bulk loops don't keep re-checking it.
+    
+    Returns:
+        Dict with available AI services and active service name
+    """
+    return _ai().get_api_status()
+
+def _extract_ai(pdf_text, filename, api_semaphore, notices):
+    # Attempt AI-powered extraction with light mode fallback for rate limits
+    try:
+        with api_semaphore:
+            extracted_data = _ai().extract_with_ai(pdf_text, filename, light_mode=True)
+        
+        # Check for errors in the response
+        if "error" in extracted_data:
+            error_msg = extracted_data["error"]
+            if "rate limit" in error_msg.lower() or "429" in error_msg:
+                notices.append("API rate limit detected. Data extracted using pattern-based fallback.")
+                extracted_data = extract_sds_data(pdf_text, "Pattern-based")
+    except Exception as e:
+        notices.append(f"AI extraction error: {str(e)}. Falling back to pattern-based extraction.")
+        extracted_data = extract_sds_data(pdf_text, "Pattern-based")
+    
+    return extracted_data
+
+def _extract_ml(pdf_text, strategy, api_semaphore, notices):
+    logger.debug(f"Using ML strategy: {strategy}")
+    try:
+        with api_semaphore:
+            extracted_data = _ml().extract_sds_with_ml(pdf_text, strategy, light_mode=True)
+        logger.debug("ML extraction complete, data keys: %s", extracted_data.keys())
+    except Exception as e:
+        logger.debug(f"Error in ML extraction: {str(e)}")
+        notices.append(f"ML extraction error: {str(e)}")
+        extracted_data = {"error": f"Extraction failed: {str(e)}"}
+    
+    # Check for errors in the response
+    if "error" in extracted_data:
+        error_msg = extracted_data["error"]
+        if "rate limit" in error_msg.lower() or "429" in error_msg:
+            notices.append("API rate limit detected. Data extracted using pattern-based fallback.")
+            extracted_data = extract_sds_data(pdf_text, "Pattern-based")
+    
+    return extracted_data
+
+def _extract_fallback(pdf_text, notices):
+    # Fallback to automatic extraction if no API keys available
+    notices.append("No AI API keys found. Falling back to automatic extraction.")
+    return extract_sds_data(pdf_text, "Automatic")
+
+def _pick_extractor(extraction_method, api_status, ml_strategy, api_semaphore):
+    """
+    Choose the bulk extraction function once, before any files are processed.
+    
+    Args:
+        extraction_method: The selected extraction method
+        api_status: The AI service status
+        ml_strategy: The selected ML extraction strategy, or None
+        api_semaphore: Semaphore limiting concurrent AI API calls
+        
+    Returns:
+        Function taking (pdf_text, filename, notices) and returning the extracted data
+    """
+    ai_available = api_status["openai_available"] or api_status["anthropic_available"]
+    
+    if extraction_method == "AI-powered" and ai_available:
+        return lambda pdf_text, filename, notices: _extract_ai(pdf_text, filename, api_semaphore, notices)
+    if extraction_method == "Advanced ML" and ai_available:
+        # Default to direct_extraction as it uses fewer API calls
+        strategy = ml_strategy or "direct_extraction"
+        return lambda pdf_text, filename, notices: _extract_ml(pdf_text, strategy, api_semaphore, notices)
+    if extraction_method in ["AI-powered", "Advanced ML"]:
+        return lambda pdf_text, filename, notices: _extract_fallback(pdf_text, notices)
+    
+    # Use regular pattern-based extraction
+    return lambda pdf_text, filename, notices: extract_sds_data(pdf_text, extraction_method)
+
+def process_one(uploaded_file, extractor, enable_ocr):
+    """
+    Extract data from a single uploaded PDF during bulk processing.
+    Runs in a worker thread, so it must not call any st.* functions; messages for
+    the user are returned and displayed by the main thread.
+    
+    Args:
+        uploaded_file: The uploaded PDF file
+        extractor: Extraction function from _pick_extractor
+        enable_ocr: Whether OCR may be used for scanned documents
+        
+    Returns:
+        Tuple of (extracted data or None, error message or None, list of notices)
+    """
+    notices = []
+    
+    try:
+        pdf_text, needs_ocr = _cached_pdf_text(uploaded_file.getvalue(), enable_ocr)
+        
+        # Extract data based on the selected method
+        extracted_data = extractor(pdf_text, uploaded_file.name, notices)
+        
+        # Add source file and timestamp
+        extracted_data['Source File'] = uploaded_file.name
+        extracted_data['Last Updated Date'] = datetime.now().strftime(DATE_FORMAT)
+        
+        return extracted_data, None, notices
+    
+    except Exception as e:
+        return None, str(e), notices
 
 # Set page configuration
 st.set_page_config(
@@ -45,15 +422,9 @@ loaded_df, loaded_history = load_dataframe()
 # Initialize session state variables
 if 'sds_data' not in st.session_state:
     if loaded_df is not None:
-        st.session_state.sds_data = loaded_df
+        st.session_state.sds_data = _apply_dtypes(loaded_df)
     else:
-        st.session_state.sds_data = pd.DataFrame(columns=[
-            'Number', 'Product Name', 'Supplier/Manufacturer', 'Hazards', 'Location', 
-            'SDS Available', 'Issue Date', 'Health Hazards', 'Health Category',
-            'Physical Hazards', 'Physical Category', 'Hazardous Substance', 'Flash Point (Deg C)',
-            'Dangerous Goods Class', 'Description', 'Packing Group', 'Appearance', 'Colour', 'Odour',
-            'Last Updated Date', 'Source File'
-        ])
+        st.session_state.sds_data = _empty_register()
 
 if 'extraction_history' not in st.session_state:
     if loaded_history:
@@ -93,13 +464,10 @@ with st.sidebar:
         # For register data - get fresh from database
         if st.session_state.sds_data is not None and not st.session_state.sds_data.empty:
             # Generate CSV data from current dataframe 
-            csv_buffer = io.StringIO()
-            st.session_state.sds_data.to_csv(csv_buffer, index=False)
-            csv_data = csv_buffer.getvalue().encode()
+            csv_data = _df_to_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
         else:
             # Create empty CSV with headers if dataframe is empty
-            headers = "Number,Product Name,Supplier/Manufacturer,Hazards,Location,SDS Available,Issue Date,Health Hazards,Health Category,Physical Hazards,Physical Category,Hazardous Substance,Flash Point (Deg C),Dangerous Goods Class,Description,Packing Group,Appearance,Colour,Odour,Last Updated Date,Source File\n"
-            csv_data = headers.encode()
+            csv_data = EMPTY_CSV_BYTES
         
         st.download_button(
             label="⬇️ Download Register CSV",
@@ -144,7 +512,7 @@ with st.sidebar:
         
         # Show AI service status if AI-powered or Advanced ML is selected
         if extraction_method in ["AI-powered", "Advanced ML"]:
-            api_status = get_api_status()
+            api_status = _cached_api_status()
             ai_status_container = st.container()
             
             with ai_status_container:
@@ -153,7 +521,7 @@ with st.sidebar:
                     
                     # Show ML extraction strategy options if Advanced ML is selected
                     if extraction_method == "Advanced ML":
-                        ml_strategies = get_ml_extraction_strategies()
+                        ml_strategies = _ml().get_ml_extraction_strategies()
                         ml_strategy = st.selectbox(
                             "ML Extraction Strategy:",
                             ml_strategies,
@@ -193,6 +561,22 @@ with st.sidebar:
         st.markdown("---")
         st.subheader("Bulk Processing")
         bulk_process = st.checkbox("Enable bulk processing", value=False)
+        
+        if bulk_process:
+            max_workers = st.slider(
+                "Parallel workers:", 
+                min_value=1, 
+                max_value=16, 
+                value=4,
+                help="Number of files processed at the same time"
+            )
+            
+            if extraction_method in ["AI-powered", "Advanced ML"]:
+                batch_submit = st.checkbox(
+                    "Submit as batch job (cheaper, async)", 
+                    value=False,
+                    help="Uses the OpenAI Batch API; results are collected later from the View & Edit Register tab"
+                )
     
     elif app_mode == "View & Edit Register":
         st.subheader("Filter Options")
@@ -202,7 +586,11 @@ with st.sidebar:
             filter_column = st.selectbox("Filter by column:", columns)
             
             if filter_column in st.session_state.sds_data.columns:
-                unique_values = st.session_state.sds_data[filter_column].dropna().unique().tolist()
+                unique_values = _unique_for(
+                    filter_column, 
+                    _df_fingerprint(st.session_state.sds_data), 
+                    st.session_state.sds_data[filter_column]
+                )
                 filter_value = st.selectbox("Select value:", ["All"] + unique_values)
         
         st.markdown("---")
@@ -210,13 +598,7 @@ with st.sidebar:
         delete_all = st.button("Clear All Data")
         
         if delete_all:
-            st.session_state.sds_data = pd.DataFrame(columns=[
-                'Number', 'Product Name', 'Supplier/Manufacturer', 'Hazards', 'Location', 
-                'SDS Available', 'Issue Date', 'Health Hazards', 'Health Category',
-                'Physical Hazards', 'Physical Category', 'Hazardous Substance', 'Flash Point (Deg C)',
-                'Dangerous Goods Class', 'Description', 'Packing Group', 'Appearance', 'Colour', 'Odour',
-                'Last Updated Date', 'Source File'
-            ])
+            st.session_state.sds_data = _empty_register()
             st.session_state.extraction_history = []
             
             # Save the empty data to file (to clear the saved data)
@@ -268,19 +650,12 @@ if app_mode == "Upload & Extract":
         # Add export options header
         st.markdown("### 📊 Export Options")
         
-        # Prepare file data for download buttons
-        if os.path.exists('data/sds_register.csv'):
-            with open('data/sds_register.csv', 'rb') as f:
-                csv_data = f.read()
+        # Prepare file data for download buttons from the in-memory register
+        if not st.session_state.sds_data.empty:
+            csv_data = _df_to_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
         else:
-            # Create empty CSV with headers if it doesn't exist
-            headers = 'Number,Product Name,Supplier/Manufacturer,Hazards,Location,SDS Available,Issue Date,Health Hazards,Health Category,Physical Hazards,Physical Category,Hazardous Substance,Flash Point (Deg C),Dangerous Goods Class,Description,Packing Group,Appearance,Colour,Odour,Last Updated Date,Source File\n'
-            csv_data = headers.encode()
-            
-            # Also save it to disk
-            os.makedirs('data', exist_ok=True)
-            with open('data/sds_register.csv', 'wb') as f:
-                f.write(csv_data)
+            # Create empty CSV with headers if no data exists
+            csv_data = EMPTY_CSV_BYTES
         
         # Add buttons for both formats
         col1, col2 = st.columns(2)
@@ -296,19 +671,10 @@ if app_mode == "Upload & Extract":
         with col2:
             # Create Excel file using session state option
             if 'sds_data' in st.session_state and not st.session_state.sds_data.empty:
-                # Create a clean copy of the dataframe for processing
-                export_df = st.session_state.sds_data.copy()
-                
-                # Pre-process complex data types to convert them to string format
-                for col in export_df.columns:
-                    export_df[col] = export_df[col].apply(lambda x: 
-                                                str(x) if isinstance(x, dict) else
-                                                '; '.join([str(i) for i in x]) if isinstance(x, list) else x)
-                
-                excel_data = generate_excel(export_df)
+                excel_data = _df_to_xlsx_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
                 st.download_button(
                     label="⬇️ Download as Excel",
-                    data=excel_data.getvalue(),
+                    data=excel_data,
                     file_name="sds_register.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -317,7 +683,37 @@ if app_mode == "Upload & Extract":
     if bulk_process:
         uploaded_files = st.file_uploader("Upload multiple SDS PDFs", type="pdf", accept_multiple_files=True)
         
-        if uploaded_files and st.button("Process All Files"):
+        use_batch = 'batch_submit' in locals() and batch_submit
+        
+        if uploaded_files and use_batch:
+            if st.button("Submit Batch Job"):
+                # Batch results are matched back by filename, so names must be unique
+                seen_names = set()
+                duplicate_names = sorted({f.name for f in uploaded_files if f.name in seen_names or seen_names.add(f.name)})
+                if duplicate_names:
+                    st.error(f"Batch jobs need unique file names. Rename or remove the duplicates: {', '.join(duplicate_names)}")
+                elif _cached_api_status()["active_service"] != "openai":
+                    st.warning("Batch jobs require the OpenAI API. Disable batch submission to process the files now.")
+                else:
+                    with st.spinner("Reading documents and submitting batch job..."):
+                        try:
+                            # Read all PDFs in parallel, then submit them as one batch
+                            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                                texts = list(executor.map(
+                                    lambda f: _cached_pdf_text(f.getvalue(), enable_ocr)[0], 
+                                    uploaded_files
+                                ))
+                            documents = {f.name: text for f, text in zip(uploaded_files, texts)}
+                            
+                            batch_id = _ai().submit_extraction_batch(documents)
+                            add_pending_batch(batch_id, extraction_method, documents)
+                            
+                            st.success(f"✅ Submitted batch job {batch_id} with {len(documents)} files. "
+                                       "Check for results from the View & Edit Register tab.")
+                        except Exception as e:
+                            st.error(f"Error submitting batch job: {str(e)}")
+        
+        elif uploaded_files and st.button("Process All Files"):
             progress_bar = st.progress(0)
             status_text = st.empty()
             
@@ -325,170 +721,96 @@ if app_mode == "Upload & Extract":
             successful_files = []
             failed_files = []
             
-            for i, uploaded_file in enumerate(uploaded_files):
-                file_progress = (i) / len(uploaded_files)
-                progress_bar.progress(file_progress)
-                status_text.text(f"Processing file {i+1} of {len(uploaded_files)}: {uploaded_file.name}")
-                
-                # Create a temporary file to store the PDF
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    tmp_path = tmp_file.name
+            # Fan the files out to worker threads, capping concurrent AI calls
+            api_semaphore = threading.Semaphore(MAX_CONCURRENT_API_CALLS)
+            selected_ml_strategy = ml_strategy if 'ml_strategy' in locals() else None
+            extractor = _pick_extractor(extraction_method, _cached_api_status(), selected_ml_strategy, api_semaphore)
+            completed = 0
+            
+            # Collect rows and logs, then add them to the session state and database in one go
+            new_rows = []
+            new_logs = []
+            history_entries = []
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(process_one, uploaded_file, extractor, enable_ocr): uploaded_file
+                    for uploaded_file in uploaded_files
+                }
                 
-                try:
-                    # Determine if OCR is needed
-                    needs_ocr = is_scanned_pdf(tmp_path) if enable_ocr else False
-                    
-                    # Get text from PDF
-                    if needs_ocr:
-                        pdf_text = process_ocr(tmp_path)
-                    else:
-                        pdf_text = read_pdf_text(tmp_path)
-                    
-                    # Extract data based on the selected method
-                    if extraction_method == "AI-powered":
-                        # Check if AI APIs are available
-                        api_status = get_api_status()
-                        if api_status["openai_available"] or api_status["anthropic_available"]:
-                            # Attempt AI-powered extraction with light mode fallback for rate limits
-                            try:
-                                with st.spinner("Extracting data with AI (this may take a moment)..."):
-                                    # Try with light mode to reduce API calls
-                                    extracted_data = extract_with_ai(pdf_text, uploaded_file.name, light_mode=True)
-                                    
-                                    # Check for errors in the response
-                                    if "error" in extracted_data:
-                                        error_msg = extracted_data["error"]
-                                        if "rate limit" in error_msg.lower() or "429" in error_msg:
-                                            st.warning("API rate limit detected. Using pattern-based extraction as fallback.")
-                                            # Fall back to pattern-based extraction
-                                            extracted_data = extract_sds_data(pdf_text, "Pattern-based")
-                                            st.info("Data extracted using fallback method.")
-                            except Exception as e:
-                                st.warning(f"AI extraction error: {str(e)}. Falling back to pattern-based extraction.")
-                                extracted_data = extract_sds_data(pdf_text, "Pattern-based")
-                        else:
-                            # Fallback to automatic extraction if no API keys available
-                            st.warning("No AI API keys found. Falling back to automatic extraction.")
-                            extracted_data = extract_sds_data(pdf_text, "Automatic")
-                    elif extraction_method == "Advanced ML":
-                        # Check if AI APIs are available
-                        api_status = get_api_status()
-                        if api_status["openai_available"] or api_status["anthropic_available"]:
-                            # Use advanced ML extraction with selected strategy and light mode
-                            try:
-                                with st.spinner("Extracting data with Advanced ML (this may take a moment)..."):
-                                    # Add debug logging
-                                    print("DEBUG: Starting Advanced ML extraction")
-                                    if 'ml_strategy' in locals():
-                                        print(f"DEBUG: Using ML strategy: {ml_strategy}")
-                                        # Use light mode to reduce API calls
-                                        try:
-                                            extracted_data = extract_sds_with_ml(pdf_text, ml_strategy, light_mode=True)
-                                            print(f"DEBUG: ML extraction complete, data keys: {list(extracted_data.keys())}")
-                                        except Exception as e:
-                                            print(f"DEBUG: Error in ML extraction: {str(e)}")
-                                            st.error(f"ML extraction error: {str(e)}")
-                                            extracted_data = {"error": f"Extraction failed: {str(e)}"}
-                                    else:
-                                        print("DEBUG: No ML strategy specified, using direct_extraction")
-                                        # Default to direct_extraction as it uses fewer API calls
-                                        try:
-                                            extracted_data = extract_sds_with_ml(pdf_text, "direct_extraction", light_mode=True)
-                                            print(f"DEBUG: ML extraction complete, data keys: {list(extracted_data.keys())}")
-                                        except Exception as e:
-                                            print(f"DEBUG: Error in ML extraction: {str(e)}")
-                                            st.error(f"ML extraction error: {str(e)}")
-                                            extracted_data = {"error": f"Extraction failed: {str(e)}"}
-                                    
-                                    # Check for errors in the response
-                                    if "error" in extracted_data:
-                                        error_msg = extracted_data["error"]
-                                        if "rate limit" in error_msg.lower() or "429" in error_msg:
-                                            st.warning("API rate limit detected. Using pattern-based extraction as fallback.")
-                                            # Fall back to pattern-based extraction
-                                            extracted_data = extract_sds_data(pdf_text, "Pattern-based")
-                                            st.info("Data extracted using fallback method.")
-                            except Exception as e:
-                                st.warning(f"ML extraction error: {str(e)}. Falling back to pattern-based extraction.")
-                                extracted_data = extract_sds_data(pdf_text, "Pattern-based")
-                        else:
-                            # Fallback to automatic extraction if no API keys available
-                            st.warning("No AI API keys found. Falling back to automatic extraction.")
-                            extracted_data = extract_sds_data(pdf_text, "Automatic")
-                    else:
-                        # Use regular pattern-based extraction
-                        extracted_data = extract_sds_data(pdf_text, extraction_method)
-                    
-                    # Add source file and timestamp
-                    extracted_data['Source File'] = uploaded_file.name
-                    extracted_data['Last Updated Date'] = datetime.now().strftime('%Y-%m-%d')
-                    
-                    # Append to the dataframe
-                    st.session_state.sds_data = pd.concat([
-                        st.session_state.sds_data, 
-                        pd.DataFrame([extracted_data])
-                    ], ignore_index=True)
-                    
-                    # Log the extraction
-                    extraction_log = {
-                        'filename': uploaded_file.name,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'extraction_method': extraction_method,
-                        'success': True,
-                        'fields_extracted': extracted_data
-                    }
-                    
-                    # Add to session state
-                    st.session_state.extraction_history.append(extraction_log)
-                    
-                    # Log directly to database
-                    add_extraction_to_history(
-                        filename=uploaded_file.name,
-                        extraction_method=extraction_method,
-                        success=True,
-                        fields_extracted=extracted_data
-                    )
-                    
-                    # Track successful file
-                    successful_files.append(extracted_data['Product Name'] or uploaded_file.name)
-                    
-                    # Mark data as changed
-                    st.session_state.data_changed = True
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    failed_files.append(f"{uploaded_file.name} (Error: {error_msg})")
+                for future in as_completed(futures):
+                    uploaded_file = futures[future]
+                    completed += 1
+                    progress_bar.progress(completed / len(uploaded_files))
+                    status_text.text(f"Processed file {completed} of {len(uploaded_files)}: {uploaded_file.name}")
                     
-                    # Add failed extraction to history
-                    extraction_log = {
-                        'filename': uploaded_file.name,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'extraction_method': extraction_method,
-                        'success': False,
-                        'error': error_msg
-                    }
+                    extracted_data, error_msg, notices = future.result()
+                    for notice in notices:
+                        st.warning(f"{uploaded_file.name}: {notice}")
                     
-                    # Add to session state
-                    st.session_state.extraction_history.append(extraction_log)
+                    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
                     
-                    # Log directly to database
-                    add_extraction_to_history(
-                        filename=uploaded_file.name,
-                        extraction_method=extraction_method,
-                        success=False,
-                        additional_info={'error': error_msg}
-                    )
-                
-                # Clean up the temporary file
-                os.unlink(tmp_path)
+                    if error_msg is None:
+                        new_rows.append({**ROW_TEMPLATE, **extracted_data})
+                        
+                        # Log the extraction
+                        extraction_log = {
+                            'filename': uploaded_file.name,
+                            'timestamp': timestamp,
+                            'extraction_method': extraction_method,
+                            'success': True,
+                            'fields_extracted': extracted_data
+                        }
+                        
+                        new_logs.append(extraction_log)
+                        
+                        # Buffer the database history entry
+                        history_entries.append({
+                            'filename': uploaded_file.name,
+                            'extraction_method': extraction_method,
+                            'success': True,
+                            'fields_extracted': extracted_data
+                        })
+                        
+                        # Track successful file
+                        successful_files.append(extracted_data.get('Product Name') or uploaded_file.name)
+                        
+                        # Mark data as changed
+                        st.session_state.data_changed = True
+                    else:
+                        failed_files.append(f"{uploaded_file.name} (Error: {error_msg})")
+                        
+                        # Add failed extraction to history
+                        extraction_log = {
+                            'filename': uploaded_file.name,
+                            'timestamp': timestamp,
+                            'extraction_method': extraction_method,
+                            'success': False,
+                            'error': error_msg
+                        }
+                        
+                        new_logs.append(extraction_log)
+                        
+                        # Buffer the database history entry
+                        history_entries.append({
+                            'filename': uploaded_file.name,
+                            'extraction_method': extraction_method,
+                            'success': False,
+                            'additional_info': {'error': error_msg}
+                        })
             
             progress_bar.progress(1.0)
             status_text.text("Processing complete!")
             
+            # Append all new rows to the dataframe with a single concat
+            if new_rows:
+                st.session_state.sds_data = _append_rows(st.session_state.sds_data, new_rows)
+            st.session_state.extraction_history.extend(new_logs)
+            add_extraction_history_bulk(history_entries)
+            
             try:
-                # Save all processed data to file - always try to save
-                save_success, save_message = save_dataframe(st.session_state.sds_data, st.session_state.extraction_history)
+                # Save the new rows - history was already logged to the database above
+                save_success, save_message = append_to_register(st.session_state.sds_data, len(new_rows))
                 
                 # Show detailed results
                 st.success(f"✅ Processed {len(uploaded_files)} files: {len(successful_files)} successful, {len(failed_files)} failed")
@@ -509,17 +831,17 @@ if app_mode == "Upload & Extract":
                 if save_success:
                     st.info(f"Data saved to register: {save_message}")
                     
-                    # Show the DataFrame to confirm contents
+                    # Show the newest rows to confirm contents
                     st.subheader("Current Register Data")
-                    st.dataframe(st.session_state.sds_data.head(10), use_container_width=True)
+                    st.dataframe(st.session_state.sds_data.tail(PREVIEW_ROWS), use_container_width=True)
+                    st.caption(f"Showing the last {min(PREVIEW_ROWS, len(st.session_state.sds_data))} of {len(st.session_state.sds_data)} rows - see View & Edit Register for the full register")
                 else:
                     st.warning(f"Data added to register but failed to save to file. Error: {save_message}")
                 
                 # Add download button right after processing - directly from the database/session
                 # Generate CSV directly from dataframe
-                csv_buffer = io.StringIO()
-                st.session_state.sds_data.to_csv(csv_buffer, index=False)
-                csv_data = csv_buffer.getvalue().encode()
+                df_hash = _df_fingerprint(st.session_state.sds_data)
+                csv_data = _df_to_csv_bytes(df_hash, st.session_state.sds_data)
                 
                 col1, col2 = st.columns(2)
                 
@@ -534,19 +856,10 @@ if app_mode == "Upload & Extract":
                 
                 with col2:
                     # Generate Excel version directly from dataframe
-                    # Create a clean copy of the dataframe for processing
-                    export_df = st.session_state.sds_data.copy()
-                    
-                    # Pre-process complex data types to convert them to string format
-                    for col in export_df.columns:
-                        export_df[col] = export_df[col].apply(lambda x: 
-                                                    str(x) if isinstance(x, dict) else
-                                                    '; '.join([str(i) for i in x]) if isinstance(x, list) else x)
-                    
-                    output = generate_excel(export_df)
+                    excel_data = _df_to_xlsx_bytes(df_hash, st.session_state.sds_data)
                     st.download_button(
                         label="⬇️ Download Register as Excel",
-                        data=output.getvalue(),
+                        data=excel_data,
                         file_name="sds_register.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True
@@ -560,82 +873,82 @@ if app_mode == "Upload & Extract":
         uploaded_file = st.file_uploader("Upload SDS PDF", type="pdf")
         
         if uploaded_file:
-            # Display the PDF
+            # Display the PDF; the image is served as a media file rather than inlined as base64
             st.subheader("Uploaded Document")
-            pdf_display = display_pdf(uploaded_file)
-            st.markdown(pdf_display, unsafe_allow_html=True)
+            preview_col = st.columns([1, 2, 1])[1]
+            with preview_col:
+                st.image(_pdf_preview_png(uploaded_file.getvalue()), caption="PDF Preview (first page only)")
+            
+            # A pending extraction belongs to this upload only if the file contents match
+            file_hash = hashlib.blake2b(uploaded_file.getvalue(), digest_size=16).hexdigest()
             
             if st.button("Extract Data"):
                 with st.spinner("Extracting data from the document..."):
-                    # Create a temporary file to store the PDF
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_path = tmp_file.name
+                    # Timestamps and the widget key suffix are computed once per extraction
+                    now = datetime.now()
+                    now_date = now.strftime(DATE_FORMAT)
+                    now_ts = now.strftime(TIMESTAMP_FORMAT)
+                    name_key = _wkey(uploaded_file.name)
+                    
+                    # Set once the AI or Advanced ML path has saved the row itself
+                    auto_saved = False
                     
                     try:
-                        # Determine if OCR is needed
-                        needs_ocr = is_scanned_pdf(tmp_path) if enable_ocr else False
-                        
-                        # Get text from PDF
+                        pdf_text, needs_ocr = _cached_pdf_text(uploaded_file.getvalue(), enable_ocr)
                         if needs_ocr:
-                            pdf_text = process_ocr(tmp_path)
                             st.info("Document was processed using OCR.")
-                        else:
-                            pdf_text = read_pdf_text(tmp_path)
                         
                         # Extract data based on the selected method
                         if extraction_method == "AI-powered":
                             # Check if AI APIs are available
-                            api_status = get_api_status()
+                            api_status = _cached_api_status()
                             if api_status["openai_available"] or api_status["anthropic_available"]:
                                 try:
                                     # Use AI-powered extraction
-                                    extracted_data = extract_with_ai(pdf_text, uploaded_file.name)
+                                    extracted_data = _ai().extract_with_ai(pdf_text, uploaded_file.name)
                                     
                                     # Add source file and timestamp immediately
                                     extracted_data['Source File'] = uploaded_file.name
-                                    extracted_data['Last Updated Date'] = datetime.now().strftime('%Y-%m-%d')
+                                    extracted_data['Last Updated Date'] = now_date
                                     
                                     st.success(f"Extraction performed using {api_status['active_service']} AI")
                                     
                                     # Auto-save the AI extraction by default
                                     st.info("AI extracted data will be saved to the register automatically")
                                     
-                                    # Directly save to the dataframe
-                                    # Create a DataFrame with a single row for this extraction
-                                    new_row_df = pd.DataFrame([extracted_data])
-                                    
-                                    # Append to the dataframe
-                                    if st.session_state.sds_data.empty:
-                                        st.session_state.sds_data = new_row_df
-                                    else:
-                                        st.session_state.sds_data = pd.concat([
-                                            st.session_state.sds_data, 
-                                            new_row_df
-                                        ], ignore_index=True)
+                                    # Append this extraction to the dataframe
+                                    st.session_state.sds_data = _append_rows(st.session_state.sds_data, [extracted_data])
                                     
                                     # Log the extraction
                                     st.session_state.extraction_history.append({
                                         'filename': uploaded_file.name,
-                                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                        'timestamp': now_ts,
                                         'status': 'Success (AI extraction)'
                                     })
                                     
-                                    # Save the data to file immediately
-                                    save_success, save_message = save_dataframe(st.session_state.sds_data, st.session_state.extraction_history)
+                                    # Log directly to database
+                                    add_extraction_to_history(
+                                        filename=uploaded_file.name,
+                                        extraction_method=extraction_method,
+                                        success=True,
+                                        fields_extracted=extracted_data
+                                    )
+                                    
+                                    # Save the new row immediately without rewriting the register
+                                    save_success, save_message = append_to_register(st.session_state.sds_data, 1)
+                                    auto_saved = save_success
                                     
                                     if save_success:
                                         st.success(f"✅ AI extraction automatically saved to register!\n{save_message}")
                                         
                                         # Show the current register with the new entry
                                         st.subheader("Current Register Data")
-                                        st.dataframe(st.session_state.sds_data, use_container_width=True)
+                                        st.dataframe(st.session_state.sds_data.tail(PREVIEW_ROWS), use_container_width=True)
+                                        st.caption(f"Showing the last {min(PREVIEW_ROWS, len(st.session_state.sds_data))} of {len(st.session_state.sds_data)} rows - see View & Edit Register for the full register")
                                         
                                         # Add a download button for immediate download - direct from database
                                         # Generate CSV directly from dataframe
-                                        csv_buffer = io.StringIO()
-                                        st.session_state.sds_data.to_csv(csv_buffer, index=False)
-                                        csv_data = csv_buffer.getvalue().encode()
+                                        csv_data = _df_to_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
                                             
                                         st.download_button(
                                             label="⬇️ Download Updated Register",
@@ -657,8 +970,8 @@ if app_mode == "Upload & Extract":
                                 extracted_data = extract_sds_data(pdf_text, "Automatic")
                         elif extraction_method == "Advanced ML":
                             # Check if AI APIs are available
-                            api_status = get_api_status()
-                            print(f"DEBUG: API Status = {api_status}")
+                            api_status = _cached_api_status()
+                            logger.debug(f"API Status = {api_status}")
                             if api_status["openai_available"] or api_status["anthropic_available"]:
                                 try:
                                     # Use advanced ML extraction with selected strategy
@@ -671,44 +984,45 @@ if app_mode == "Upload & Extract":
                                     
                                     if 'ml_strategy' in locals():
                                         ml_status.info(f"Using {ml_strategy} extraction strategy...")
-                                        print(f"DEBUG: Calling extract_sds_with_ml with strategy={ml_strategy}")
+                                        logger.debug(f"Calling extract_sds_with_ml with strategy={ml_strategy}")
                                         try:
-                                            extracted_data = extract_sds_with_ml(pdf_text, ml_strategy, light_mode=True)
-                                            print(f"DEBUG: ML extraction result keys: {list(extracted_data.keys())}")
+                                            extracted_data = _ml().extract_sds_with_ml(pdf_text, ml_strategy, light_mode=True)
+                                            logger.debug("ML extraction result keys: %s", extracted_data.keys())
                                         except Exception as ml_err:
-                                            print(f"DEBUG: Error in extract_sds_with_ml: {str(ml_err)}")
+                                            logger.debug(f"Error in extract_sds_with_ml: {str(ml_err)}")
                                             st.error(f"ML extraction error: {str(ml_err)}")
                                             # Fall back to AI extraction
                                             ml_status.warning("ML extraction failed, falling back to basic AI extraction...")
-                                            extracted_data = extract_with_ai(pdf_text, light_mode=True)
+                                            extracted_data = _ai().extract_with_ai(pdf_text, light_mode=True)
                                     else:
                                         # Default to direct_extraction if no strategy selected (uses fewer API calls)
                                         ml_status.info("Using direct extraction strategy...")
-                                        print("DEBUG: Using direct_extraction as no strategy was specified")
+                                        logger.debug("Using direct_extraction as no strategy was specified")
                                         try:
-                                            extracted_data = extract_sds_with_ml(pdf_text, "direct_extraction", light_mode=True)
-                                            print(f"DEBUG: ML extraction result keys: {list(extracted_data.keys())}")
+                                            extracted_data = _ml().extract_sds_with_ml(pdf_text, "direct_extraction", light_mode=True)
+                                            logger.debug("ML extraction result keys: %s", extracted_data.keys())
                                         except Exception as ml_err:
-                                            print(f"DEBUG: Error in extract_sds_with_ml: {str(ml_err)}")
+                                            logger.debug(f"Error in extract_sds_with_ml: {str(ml_err)}")
                                             st.error(f"ML extraction error: {str(ml_err)}")
                                             # Fall back to AI extraction
                                             ml_status.warning("ML extraction failed, falling back to basic AI extraction...")
-                                            extracted_data = extract_with_ai(pdf_text, light_mode=True)
+                                            extracted_data = _ai().extract_with_ai(pdf_text, light_mode=True)
                                     
                                     # Check if there was an error in the extraction
                                     if "error" in extracted_data:
                                         error_msg = extracted_data["error"]
                                         ml_status.warning(f"ML extraction returned an error: {error_msg}")
-                                        print(f"DEBUG: ML extraction error from response: {error_msg}")
-                                        # Fall back to AI extraction
-                                        extracted_data = extract_with_ai(pdf_text, light_mode=True)
-                                        ml_status.info("Using basic AI extraction as fallback...")
+                                        logger.debug(f"ML extraction error from response: {error_msg}")
+                                        # Light mode already made the basic AI call, including its schema
+                                        # validation retries, so repeating it would only pay for the same failure
+                                        extracted_data = extract_sds_data(pdf_text, "Automatic")
+                                        ml_status.info("Using automatic extraction as fallback...")
                                     else:
                                         ml_status.success("ML extraction completed successfully!")
                                     
                                     # Add source file and timestamp immediately
                                     extracted_data['Source File'] = uploaded_file.name
-                                    extracted_data['Last Updated Date'] = datetime.now().strftime('%Y-%m-%d')
+                                    extracted_data['Last Updated Date'] = now_date
                                     
                                     st.success(f"Extraction performed using Advanced ML with {api_status['active_service']}")
                                     
@@ -721,23 +1035,14 @@ if app_mode == "Upload & Extract":
                                     # Auto-save the ML extraction by default
                                     st.info("ML extracted data will be saved to the register automatically")
                                     
-                                    # Directly save to the dataframe
-                                    new_row_df = pd.DataFrame([extracted_data])
-                                    
-                                    # Append to the dataframe
-                                    if st.session_state.sds_data.empty:
-                                        st.session_state.sds_data = new_row_df
-                                    else:
-                                        st.session_state.sds_data = pd.concat([
-                                            st.session_state.sds_data, 
-                                            new_row_df
-                                        ], ignore_index=True)
+                                    # Append this extraction to the dataframe
+                                    st.session_state.sds_data = _append_rows(st.session_state.sds_data, [extracted_data])
                                     
                                     # Log the extraction with detailed method information
                                     extraction_method_detail = f"Advanced ML ({ml_strategy if 'ml_strategy' in locals() else 'multi_pass_extraction'})"
                                     st.session_state.extraction_history.append({
                                         'filename': uploaded_file.name,
-                                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                        'timestamp': now_ts,
                                         'extraction_method': extraction_method_detail,
                                         'success': True,
                                         'fields_extracted': extracted_data
@@ -751,8 +1056,9 @@ if app_mode == "Upload & Extract":
                                         fields_extracted=extracted_data
                                     )
                                     
-                                    # Save to database
-                                    save_success, save_message = save_dataframe(st.session_state.sds_data, st.session_state.extraction_history)
+                                    # Save the new row to the database - history was already logged above
+                                    save_success, save_message = append_to_register(st.session_state.sds_data, 1)
+                                    auto_saved = save_success
                                     st.session_state.data_changed = True
                                     
                                     # Display the extracted data
@@ -765,9 +1071,7 @@ if app_mode == "Upload & Extract":
                                         st.success(f"Advanced ML extraction saved to register: {save_message}")
                                         
                                         # Add a download button for the updated register
-                                        csv_buffer = io.StringIO()
-                                        st.session_state.sds_data.to_csv(csv_buffer, index=False)
-                                        csv_data = csv_buffer.getvalue().encode()
+                                        csv_data = _df_to_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
                                             
                                         st.download_button(
                                             label="⬇️ Download Updated Register",
@@ -792,86 +1096,104 @@ if app_mode == "Upload & Extract":
                         
                         # Add source file and timestamp
                         extracted_data['Source File'] = uploaded_file.name
-                        extracted_data['Last Updated Date'] = datetime.now().strftime('%Y-%m-%d')
-                        
-                        # Display extracted data with editable fields in a simpler form
-                        st.subheader("Extracted Information")
-                        edited_data = {}
+                        extracted_data['Last Updated Date'] = now_date
                         
-                        # Create copies of the extracted data for editing
-                        for key, value in extracted_data.items():
-                            if key != 'Source File' and key != 'Last Updated Date':
-                                # Use a more unique key pattern to avoid conflicts
-                                input_key = f"edit_{key}_{hash(uploaded_file.name)}"
-                                edited_value = st.text_input(key, value, key=input_key)
-                                edited_data[key] = edited_value
-                            else:
-                                edited_data[key] = value
-                        
-                        # Create a simple button instead of a form
-                        if st.button("Save to Register", key=f"save_btn_{hash(uploaded_file.name)}"):
-                            try:
-                                # Create a DataFrame with a single row for this extraction
-                                new_row_df = pd.DataFrame([edited_data])
-                                
-                                # Append to the dataframe
-                                if st.session_state.sds_data.empty:
-                                    st.session_state.sds_data = new_row_df
-                                else:
-                                    st.session_state.sds_data = pd.concat([
-                                        st.session_state.sds_data, 
-                                        new_row_df
-                                    ], ignore_index=True)
-                                
-                                # Log the extraction
-                                st.session_state.extraction_history.append({
-                                    'filename': uploaded_file.name,
-                                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                    'status': 'Success'
-                                })
-                                
-                                # Print status for debugging
-                                st.write(f"DataFrame shape: {st.session_state.sds_data.shape}")
-                                
-                                # Save the data to file
-                                save_success, save_message = save_dataframe(st.session_state.sds_data, st.session_state.extraction_history)
-                                
-                                if save_success:
-                                    st.success(f"✅ Data saved to register and file successfully!\n{save_message}")
-                                    
-                                    # Show the first few rows of the dataframe to confirm
-                                    st.subheader("Current Register Data")
-                                    st.dataframe(st.session_state.sds_data, use_container_width=True)
-                                    
-                                    # Add a download button for immediate download - direct from database
-                                    # Use our new custom CSV generator that starts data in column A
-                                    # This properly reformats columns and places data at column A
-                                    csv_buffer = generate_csv(st.session_state.sds_data)
-                                    csv_data = csv_buffer.getvalue().encode()
-                                        
-                                    st.download_button(
-                                        label="⬇️ Download Updated Register",
-                                        data=csv_data,
-                                        file_name="sds_register.csv",
-                                        mime="text/csv"
-                                    )
-                                else:
-                                    st.warning(f"Data saved to register but failed to save to file. Error: {save_message}")
-                            except Exception as e:
-                                st.error(f"Error saving data: {str(e)}")
-                                import traceback
-                                st.code(traceback.format_exc())
+                        if auto_saved:
+                            # Already in the register, so don't offer to save it again
+                            st.session_state.pop('pending_extraction', None)
+                        else:
+                            # Keep the extraction across reruns so the edit form below can be submitted
+                            st.session_state.pending_extraction = {
+                                'file_hash': file_hash,
+                                'name_key': name_key,
+                                'data': extracted_data
+                            }
                         
                     except Exception as e:
                         st.error(f"Error during extraction: {str(e)}")
                         st.session_state.extraction_history.append({
                             'filename': uploaded_file.name,
-                            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                            'timestamp': now_ts,
                             'status': f'Failed: {str(e)}'
                         })
+            
+            pending_extraction = st.session_state.get('pending_extraction')
+            if pending_extraction and pending_extraction['file_hash'] == file_hash:
+                extracted_data = pending_extraction['data']
+                name_key = pending_extraction['name_key']
+                
+                # Display extracted data with editable fields in a form, so edits
+                # only trigger a rerun when the form is submitted
+                st.subheader("Extracted Information")
+                edited_data = {}
+                
+                with st.form(f"edit_{name_key}"):
+                    # Create copies of the extracted data for editing
+                    for key, value in extracted_data.items():
+                        if key != 'Source File' and key != 'Last Updated Date':
+                            # Use a more unique key pattern to avoid conflicts
+                            input_key = f"edit_{key}_{name_key}"
+                            edited_value = st.text_input(key, value, key=input_key)
+                            edited_data[key] = edited_value
+                        else:
+                            edited_data[key] = value
                     
-                    # Clean up the temporary file
-                    os.unlink(tmp_path)
+                    submitted = st.form_submit_button("Save to Register")
+                
+                if submitted:
+                    try:
+                        # Append this extraction to the dataframe
+                        st.session_state.sds_data = _append_rows(st.session_state.sds_data, [edited_data])
+                        
+                        # Log the extraction
+                        st.session_state.extraction_history.append({
+                            'filename': uploaded_file.name,
+                            'timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
+                            'status': 'Success'
+                        })
+                        
+                        # Log directly to database
+                        add_extraction_to_history(
+                            filename=uploaded_file.name,
+                            extraction_method=extraction_method,
+                            success=True,
+                            fields_extracted=edited_data
+                        )
+                        
+                        # Print status for debugging
+                        st.write(f"DataFrame shape: {st.session_state.sds_data.shape}")
+                        
+                        # Save the new row to file without rewriting the register
+                        save_success, save_message = append_to_register(st.session_state.sds_data, 1)
+                        
+                        if save_success:
+                            # The extraction has been saved, so stop offering the form
+                            del st.session_state.pending_extraction
+                            
+                            st.success(f"✅ Data saved to register and file successfully!\n{save_message}")
+                            
+                            # Show the newest rows of the dataframe to confirm
+                            st.subheader("Current Register Data")
+                            st.dataframe(st.session_state.sds_data.tail(PREVIEW_ROWS), use_container_width=True)
+                            st.caption(f"Showing the last {min(PREVIEW_ROWS, len(st.session_state.sds_data))} of {len(st.session_state.sds_data)} rows - see View & Edit Register for the full register")
+                            
+                            # Add a download button for immediate download - direct from database
+                            # Use our new custom CSV generator that starts data in column A
+                            # This properly reformats columns and places data at column A
+                            csv_data = _df_to_report_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
+                                
+                            st.download_button(
+                                label="⬇️ Download Updated Register",
+                                data=csv_data,
+                                file_name="sds_register.csv",
+                                mime="text/csv"
+                            )
+                        else:
+                            st.warning(f"Data saved to register but failed to save to file. Error: {save_message}")
+                    except Exception as e:
+                        st.error(f"Error saving data: {str(e)}")
+                        import traceback
+                        st.code(traceback.format_exc())
 
 elif app_mode == "View & Edit Register":
     st.header("SDS Data Register")
@@ -883,12 +1205,10 @@ elif app_mode == "View & Edit Register":
         if st.session_state.sds_data is not None and not st.session_state.sds_data.empty:
             # Use our new custom CSV generator that starts data in column A
             # This properly reformats columns and places data at column A
-            csv_buffer = generate_csv(st.session_state.sds_data)
-            csv_data = csv_buffer.getvalue().encode()
+            csv_data = _df_to_report_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
         else:
             # Create empty CSV with headers if no data exists
-            headers = 'Number,Product Name,Supplier/Manufacturer,Hazards,Location,SDS Available,Issue Date,Health Hazards,Health Category,Physical Hazards,Physical Category,Hazardous Substance,Flash Point (Deg C),Dangerous Goods Class,Description,Packing Group,Appearance,Colour,Odour,Last Updated Date,Source File\n'
-            csv_data = headers.encode()
+            csv_data = EMPTY_CSV_BYTES
             
         st.download_button(
             label="⬇️ Download Register",
@@ -903,7 +1223,8 @@ elif app_mode == "View & Edit Register":
     else:
         # Apply filtering if specified
         if 'filter_column' in locals() and 'filter_value' in locals() and filter_value != "All":
-            filtered_df = st.session_state.sds_data[st.session_state.sds_data[filter_column] == filter_value]
+            filter_mask = get_filter_mask(st.session_state.sds_data[filter_column], filter_value)
+            filtered_df = st.session_state.sds_data.loc[filter_mask]
         else:
             filtered_df = st.session_state.sds_data
         
@@ -925,15 +1246,27 @@ elif app_mode == "View & Edit Register":
                 st.subheader(f"Editing: {filtered_df.loc[record_idx, product_name_col]}")
                 
                 edited_values = {}
-                for column in filtered_df.columns:
-                    if column not in ['Source File']:
-                        current_value = filtered_df.loc[record_idx, column]
-                        edited_value = st.text_input(f"{column}:", current_value, key=f"edit_{column}_{record_idx}")
-                        edited_values[column] = edited_value
+                with st.form(f"edit_record_{record_idx}"):
+                    for column in filtered_df.columns:
+                        if column not in ['Source File']:
+                            current_value = filtered_df.loc[record_idx, column]
+                            if pd.isna(current_value):
+                                current_value = ""
+                            edited_value = st.text_input(f"{column}:", current_value, key=f"edit_{column}_{record_idx}")
+                            edited_values[column] = edited_value
+                    
+                    update_record = st.form_submit_button("Update Record")
                 
-                if st.button("Update Record"):
-                    for column, value in edited_values.items():
-                        st.session_state.sds_data.loc[record_idx, column] = value
+                if update_record:
+                    # Categorical columns only accept values already in their categories
+                    for column in CATEGORICAL_COLS.intersection(edited_values):
+                        column_data = st.session_state.sds_data[column]
+                        value = edited_values[column]
+                        if isinstance(column_data.dtype, pd.CategoricalDtype) and value not in column_data.cat.categories:
+                            st.session_state.sds_data[column] = column_data.cat.add_categories([value])
+                    
+                    # Update the whole row in a single assignment
+                    st.session_state.sds_data.loc[record_idx, list(edited_values)] = list(edited_values.values())
                     
                     # Save the updated data
                     save_success, save_message = save_dataframe(st.session_state.sds_data, st.session_state.extraction_history)
@@ -958,6 +1291,79 @@ elif app_mode == "View & Edit Register":
                     
                     st.rerun()
     
+    # Pending AI batch jobs
+    pending_batches = get_pending_batches()
+    if pending_batches:
+        st.header("Pending Batch Jobs")
+        st.write(f"{len(pending_batches)} batch job(s) waiting for results")
+        
+        if st.button("Check pending batches"):
+            new_rows = []
+            new_logs = []
+            history_entries = []
+            
+            for batch in pending_batches:
+                try:
+                    status, results = _ai().retrieve_extraction_batch(batch['batch_id'], batch['documents'])
+                except Exception as e:
+                    st.error(f"Error checking batch {batch['batch_id']}: {str(e)}")
+                    continue
+                
+                if results is None:
+                    st.info(f"Batch {batch['batch_id']} is still {status}")
+                    continue
+                
+                now = datetime.now()
+                date_str = now.strftime(DATE_FORMAT)
+                timestamp = now.strftime(TIMESTAMP_FORMAT)
+                
+                for filename, extracted_data in results.items():
+                    success = "error" not in extracted_data
+                    if success:
+                        # Add source file and timestamp
+                        extracted_data['Source File'] = filename
+                        extracted_data['Last Updated Date'] = date_str
+                        new_rows.append({**ROW_TEMPLATE, **extracted_data})
+                    
+                    # Log the extraction
+                    extraction_log = {
+                        'filename': filename,
+                        'timestamp': timestamp,
+                        'extraction_method': f"{batch['extraction_method']} (batch)",
+                        'success': success
+                    }
+                    if success:
+                        extraction_log['fields_extracted'] = extracted_data
+                    else:
+                        extraction_log['error'] = extracted_data['error']
+                    new_logs.append(extraction_log)
+                    
+                    # Buffer the database history entry
+                    history_entries.append({
+                        'filename': filename,
+                        'extraction_method': extraction_log['extraction_method'],
+                        'success': success,
+                        'fields_extracted': extracted_data if success else None,
+                        'additional_info': None if success else {'error': extracted_data['error']}
+                    })
+                
+                update_batch_status(batch['batch_id'], status)
+                st.success(f"Batch {batch['batch_id']} {status}: {len(results)} results collected")
+            
+            # Append all collected rows to the dataframe with a single concat
+            if new_rows:
+                st.session_state.sds_data = _append_rows(st.session_state.sds_data, new_rows)
+                st.session_state.data_changed = True
+            st.session_state.extraction_history.extend(new_logs)
+            add_extraction_history_bulk(history_entries)
+            
+            if new_logs:
+                save_success, save_message = append_to_register(st.session_state.sds_data, len(new_rows))
+                if save_success:
+                    st.info(f"Data saved to register: {save_message}")
+                else:
+                    st.warning(f"Data added to register but failed to save to file. Error: {save_message}")
+    
     # Extraction History
     st.header("Extraction History")
     if st.session_state.extraction_history:
@@ -981,12 +1387,10 @@ elif app_mode == "Generate Reports":
     if st.session_state.sds_data is not None and not st.session_state.sds_data.empty:
         # Use our new custom CSV generator that starts data in column A
         # This properly reformats columns and places data at column A
-        csv_buffer = generate_csv(st.session_state.sds_data)
-        csv_data = csv_buffer.getvalue().encode()
+        csv_data = _df_to_report_csv_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
     else:
         # Create empty CSV with headers if no data exists
-        headers = 'Number,Product Name,Supplier/Manufacturer,Hazards,Location,SDS Available,Issue Date,Health Hazards,Health Category,Physical Hazards,Physical Category,Hazardous Substance,Flash Point (Deg C),Dangerous Goods Class,Description,Packing Group,Appearance,Colour,Odour,Last Updated Date,Source File\n'
-        csv_data = headers.encode()
+        csv_data = EMPTY_CSV_BYTES
     
     with col1:
         st.download_button(
@@ -1001,21 +1405,15 @@ elif app_mode == "Generate Reports":
         # For Excel, we need some data to create a valid Excel file
         if not st.session_state.sds_data.empty:
             # Generate Excel from session data if available
-            output = generate_excel(st.session_state.sds_data)
+            excel_data = _df_to_xlsx_bytes(_df_fingerprint(st.session_state.sds_data), st.session_state.sds_data)
         else:
-            # Create an empty DataFrame with the correct columns
-            empty_df = pd.DataFrame(columns=[
-                'Product Name', 'CAS Number', 'Chemical Identification', 
-                'Hazard Classification', 'Precautionary Statements', 
-                'First Aid Measures', 'Supplier Information', 
-                'Environmental Hazards', 'Regulatory Compliance Information',
-                'Last Updated Date', 'Source File'
-            ])
-            output = generate_excel(empty_df)
+            # Create an empty register with the correct columns
+            empty_df = _empty_register()
+            excel_data = _df_to_xlsx_bytes(_df_fingerprint(empty_df), empty_df)
             
         st.download_button(
             label="⬇️ Download as Excel",
-            data=output.getvalue(),
+            data=excel_data,
             file_name="sds_register.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
@@ -1047,27 +1445,27 @@ elif app_mode == "Generate Reports":
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 
                 if report_format == "Excel":
-                    # Generate Excel file
-                    output = generate_excel(export_df)
+                    # Generate Excel file, reusing the cached bytes for an unchanged selection
+                    excel_data = _df_to_xlsx_bytes(_df_fingerprint(export_df), export_df)
                     file_name = f"SDS_Register_{timestamp}.xlsx"
                     
                     # Create a download button using Streamlit's download_button
                     st.download_button(
                         label="Download Excel File",
-                        data=output.getvalue(),
+                        data=excel_data,
                         file_name=file_name,
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                     )
                 
                 else:  # CSV
-                    # Generate CSV file
-                    output = generate_csv(export_df)
+                    # Generate CSV file, reusing the cached bytes for an unchanged selection
+                    csv_data = _df_to_report_csv_bytes(_df_fingerprint(export_df), export_df)
                     file_name = f"SDS_Register_{timestamp}.csv"
                     
                     # Create a download button using Streamlit's download_button
                     st.download_button(
                         label="Download CSV File",
-                        data=output.getvalue(),
+                        data=csv_data,
                         file_name=file_name,
                         mime="text/csv"
                     )
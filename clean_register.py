@@ -3,11 +3,246 @@ Script to clean and fix the SDS register CSV file by removing duplicate columns
 and standardizing the format.
 """
 
+import argparse
+import csv
+import glob
+import numpy as np
 import pandas as pd
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
 
-def clean_csv_register(input_file='data/sds_register.csv', output_file=None):
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Errors from reading or writing a CSV file; anything else is a bug and propagates
+_READ_WRITE_ERRORS = (OSError, UnicodeDecodeError, csv.Error, pd.errors.ParserError)
+if pa is not None:
+    _READ_WRITE_ERRORS += (pa.ArrowException,)
+
+# Standard columns we want in the output (in order)
+STANDARD_COLUMNS = (
+    'Number',
+    'Product Name',
+    'Supplier/Manufacturer',
+    'CAS Number',
+    'Chemical ID',
+    'Location',
+    'SDS Available',
+    'Issue Date',
+    'Health Hazards',
+    'Health Category',
+    'Physical Hazards',
+    'Physical Category',
+    'Hazardous Substance',
+    'Flash Point (Deg C)',
+    'Dangerous Goods Class',
+    'Description',
+    'Packing Group',
+    'Appearance',
+    'Colour',
+    'Odour',
+    'First Aid Measures',
+    'Firefighting Measures',
+    'Storage Use',
+    'Environmental Hazards',
+    'Source File',
+    'Last Updated Date'
+)
+
+# Columns with few distinct values, read as dictionary-encoded (categorical) strings
+LOW_CARDINALITY_COLUMNS = frozenset({
+    'Dangerous Goods Class', 'Packing Group', 'Health Category', 'Physical Category', 'SDS Available'
+})
+
+# Map from lowercase/snake_case and other alternative names to our standard column names
+_COLUMN_MAPPING = MappingProxyType({
+    'number': 'Number',
+    'product_name': 'Product Name',
+    'supplier_manufacturer': 'Supplier/Manufacturer',
+    'cas_number': 'CAS Number',
+    'chemical_identification': 'Chemical ID',
+    'Chemical Identification': 'Chemical ID',
+    'hazards': 'Hazards',
+    'location': 'Location',
+    'sds_available': 'SDS Available',
+    'issue_date': 'Issue Date',
+    'health_hazards': 'Health Hazards',
+    'health_category': 'Health Category',
+    'physical_hazards': 'Physical Hazards',
+    'physical_category': 'Physical Category',
+    'hazardous_substance': 'Hazardous Substance',
+    'flash_point': 'Flash Point (Deg C)',
+    'Flash Point': 'Flash Point (Deg C)',
+    'dangerous_goods_class': 'Dangerous Goods Class',
+    'description': 'Description',
+    'packing_group': 'Packing Group',
+    'appearance': 'Appearance',
+    'colour': 'Colour',
+    'odour': 'Odour',
+    'first_aid_measures': 'First Aid Measures',
+    'firefighting_measures': 'Firefighting Measures',
+})
+
+# Alternative source columns for each target column, title case before snake_case,
+# so each target needs a single lookup
+_SOURCES_BY_TARGET = MappingProxyType({
+    target: tuple(sorted(
+        (source for source, mapped in _COLUMN_MAPPING.items() if mapped == target),
+        key=lambda source: not source[0].isupper()
+    ))
+    for target in dict.fromkeys(_COLUMN_MAPPING.values())
+})
+
+def stream_clean_csv(input_file, output_file, chosen_sources, standard_columns):
+    """
+    Write the cleaned register batch by batch with PyArrow's streaming CSV reader
+    and writer, so only one batch of rows is held in memory.
+    
+    Args:
+        input_file: Path to the CSV file to clean
+        output_file: Path to save the cleaned CSV file; may be the input file
+        chosen_sources: Dictionary mapping each target column to its source column
+        standard_columns: The target columns, in output order
+        
+    Returns:
+        Number of rows written
+    """
+    # Read every used column as a string so inferred types can't differ between batches;
+    # low-cardinality columns are dictionary-encoded
+    column_types = {
+        target: pa.dictionary(pa.int32(), pa.string()) if target in LOW_CARDINALITY_COLUMNS else pa.string()
+        for target in standard_columns
+    }
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=list(dict.fromkeys(chosen_sources.values())),
+        column_types={source: column_types[target] for target, source in chosen_sources.items()},
+        strings_can_be_null=True
+    )
+    
+    # Sequential numbers are generated when the Number column is missing or empty,
+    # which needs a pass over that column alone before streaming
+    numbers_missing = True
+    if 'Number' in chosen_sources:
+        number_source = chosen_sources['Number']
+        number_column = pa_csv.read_csv(input_file, convert_options=pa_csv.ConvertOptions(
+            include_columns=[number_source],
+            column_types={number_source: pa.string()},
+            strings_can_be_null=True
+        )).column(number_source)
+        numbers_missing = number_column.null_count == len(number_column)
+    
+    if numbers_missing:
+        column_types['Number'] = pa.int64()
+    schema = pa.schema(list(column_types.items()))
+    
+    # Write to a temporary file first, as the output may overwrite the input
+    tmp_file = f"{output_file}.tmp"
+    row_count = 0
+    try:
+        reader = pa_csv.open_csv(input_file, convert_options=convert_options)
+        with pa_csv.CSVWriter(tmp_file, schema, write_options=pa_csv.WriteOptions(quoting_style='all_valid')) as writer:
+            for batch in reader:
+                arrays = []
+                for column in standard_columns:
+                    if column == 'Number' and numbers_missing:
+                        arrays.append(pa.array(np.arange(row_count + 1, row_count + batch.num_rows + 1, dtype=np.int64)))
+                    elif column in chosen_sources:
+                        arrays.append(batch.column(chosen_sources[column]))
+                    else:
+                        arrays.append(pa.nulls(batch.num_rows, column_types[column]))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                row_count += batch.num_rows
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        # Don't leave a partial temporary file behind
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    
+    return row_count
+
+def choose_sources(header):
+    """
+    Choose the source column in a CSV header for each standard column.
+    
+    Args:
+        header: List of the CSV's column names
+        
+    Returns:
+        Tuple of (dictionary mapping each target column to its source column,
+        list of log lines describing each choice)
+    """
+    header_set = set(header)
+    
+    # For each target column, choose the best source column
+    chosen_sources = {}
+    log_lines = []
+    for target_col in STANDARD_COLUMNS:
+        # A column that already has the standard name is always preferred
+        if target_col in header_set:
+            chosen_source = target_col
+        else:
+            chosen_source = next((source for source in _SOURCES_BY_TARGET.get(target_col, ()) if source in header_set), None)
+        
+        if chosen_source is None:
+            log_lines.append(f"No matching source column found for '{target_col}'")
+            continue
+        
+        log_lines.append(f"Using '{chosen_source}' as source for '{target_col}'")
+        chosen_sources[target_col] = chosen_source
+    
+    return chosen_sources, log_lines
+
+def pandas_clean_csv(input_file, output_file, chosen_sources):
+    """
+    Write the cleaned register with pandas, for when PyArrow isn't available.
+    
+    Args:
+        input_file: Path to the CSV file to clean
+        output_file: Path to save the cleaned CSV file; may be the input file
+        chosen_sources: Dictionary mapping each target column to its source column
+        
+    Returns:
+        Number of rows written
+    """
+    # Load only the source columns (all columns when none match, so the row
+    # count is still known); low-cardinality columns are read as categoricals
+    df = pd.read_csv(
+        input_file,
+        usecols=list(dict.fromkeys(chosen_sources.values())) or None,
+        dtype={source: 'category' for target, source in chosen_sources.items() if target in LOW_CARDINALITY_COLUMNS}
+    )
+    
+    # Build the cleaned dataframe in one go; targets without a source are left empty.
+    # The source columns share df's index, so pass their arrays to skip index alignment
+    clean_columns = {target_col: df[source].array for target_col, source in chosen_sources.items()}
+    clean_df = pd.DataFrame(clean_columns, index=df.index, columns=list(STANDARD_COLUMNS), copy=False)
+    
+    # Generate sequential numbers if missing
+    # Numeric columns can't hold empty strings, so only object columns need the string check
+    number_col = clean_df['Number']
+    if pd.api.types.is_numeric_dtype(number_col):
+        numbers_missing = number_col.isna().all()
+    else:
+        numbers_missing = not number_col.dropna().astype(str).ne('').any()
+    if numbers_missing:
+        clean_df['Number'] = np.arange(1, len(clean_df) + 1, dtype=np.int64)
+    
+    # Save the cleaned dataframe, quoting every field; missing values are written as empty strings
+    rows = clean_df.astype(object).where(clean_df.notna(), '').itertuples(index=False, name=None)
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(clean_df.columns)
+        writer.writerows(rows)
+    
+    return len(clean_df)
+
+def clean_csv_register(input_file='data/sds_register.csv', output_file=None, verbose=False):
     """
     Clean the SDS register CSV file by removing duplicate columns
     and standardizing the format.
@@ -15,6 +250,7 @@ def clean_csv_register(input_file='data/sds_register.csv', output_file=None):
     Args:
         input_file: Path to the CSV file to clean
         output_file: Path to save the cleaned CSV file (defaults to overwriting input file)
+        verbose: Whether to list the original columns and the source chosen for each column
         
     Returns:
         True if successful, False otherwise
@@ -27,154 +263,51 @@ def clean_csv_register(input_file='data/sds_register.csv', output_file=None):
     if output_file is None:
         output_file = input_file
     
+    # Read the header of the CSV file
+    print(f"Reading CSV file: {input_file}")
     try:
-        # Read the CSV file
-        print(f"Reading CSV file: {input_file}")
-        df = pd.read_csv(input_file)
-        print(f"Original CSV has {len(df)} rows and {len(df.columns)} columns")
-        
-        # Standard columns we want in the output (in order)
-        standard_columns = [
-            'Number',
-            'Product Name',
-            'Supplier/Manufacturer',
-            'CAS Number',
-            'Chemical ID',
-            'Location',
-            'SDS Available',
-            'Issue Date',
-            'Health Hazards',
-            'Health Category',
-            'Physical Hazards',
-            'Physical Category',
-            'Hazardous Substance',
-            'Flash Point (Deg C)',
-            'Dangerous Goods Class',
-            'Description',
-            'Packing Group',
-            'Appearance',
-            'Colour',
-            'Odour',
-            'First Aid Measures',
-            'Firefighting Measures',
-            'Storage Use',
-            'Environmental Hazards',
-            'Source File',
-            'Last Updated Date'
-        ]
-        
-        # Create a new empty dataframe with the standard columns
-        clean_df = pd.DataFrame(index=df.index, columns=standard_columns)
-        
-        # Display the original column names
-        print("Original columns:")
-        for col in df.columns:
-            print(f"  - {col}")
-        
-        # Map from lowercase/snake_case to our standard column names
-        column_mapping = {
-            # Standard lowercase/snake_case fields
-            'number': 'Number',
-            'product_name': 'Product Name',
-            'supplier_manufacturer': 'Supplier/Manufacturer',
-            'cas_number': 'CAS Number',
-            'chemical_identification': 'Chemical ID',
-            'Chemical Identification': 'Chemical ID',
-            'hazards': 'Hazards',
-            'location': 'Location',
-            'sds_available': 'SDS Available',
-            'issue_date': 'Issue Date',
-            'health_hazards': 'Health Hazards',
-            'health_category': 'Health Category',
-            'physical_hazards': 'Physical Hazards',
-            'physical_category': 'Physical Category',
-            'hazardous_substance': 'Hazardous Substance',
-            'flash_point': 'Flash Point (Deg C)',
-            'Flash Point': 'Flash Point (Deg C)',
-            'dangerous_goods_class': 'Dangerous Goods Class',
-            'description': 'Description',
-            'packing_group': 'Packing Group',
-            'appearance': 'Appearance',
-            'colour': 'Colour',
-            'odour': 'Odour',
-            'first_aid_measures': 'First Aid Measures',
-            'First Aid Measures': 'First Aid Measures',
-            'firefighting_measures': 'Firefighting Measures',
-            'Firefighting Measures': 'Firefighting Measures',
-            'Storage Use': 'Storage Use',
-            'Environmental Hazards': 'Environmental Hazards',
-            'Source File': 'Source File',
-            'Last Updated Date': 'Last Updated Date',
-            
-            # Title case versions
-            'Number': 'Number',
-            'Product Name': 'Product Name',
-            'Supplier/Manufacturer': 'Supplier/Manufacturer',
-            'CAS Number': 'CAS Number',
-            'Health Hazards': 'Health Hazards',
-            'Health Category': 'Health Category',
-            'Physical Hazards': 'Physical Hazards',
-            'Physical Category': 'Physical Category',
-            'Appearance': 'Appearance',
-            'Colour': 'Colour',
-            'Odour': 'Odour',
-        }
-        
-        # First fill in the new dataframe from the old one
-        # For each target column, choose the best source column
-        for target_col in standard_columns:
-            # Find all possible source columns for this target
-            sources = [source for source, target in column_mapping.items() 
-                      if target == target_col and source in df.columns]
-            
-            if not sources:
-                print(f"No matching source column found for '{target_col}'")
-                continue
-                
-            # Prefer title case sources over snake_case sources
-            title_case_sources = [s for s in sources if s[0].isupper()]
-            snake_case_sources = [s for s in sources if not s[0].isupper()]
-            
-            # Choose the source based on preference
-            if title_case_sources:
-                # Prefer exact column name match if available
-                if target_col in title_case_sources:
-                    chosen_source = target_col
-                else:
-                    chosen_source = title_case_sources[0]
-            elif snake_case_sources:
-                chosen_source = snake_case_sources[0]
-            else:
-                chosen_source = sources[0]
-            
-            # Copy data from chosen source to target
-            print(f"Using '{chosen_source}' as source for '{target_col}'")
-            clean_df[target_col] = df[chosen_source]
-        
-        # Generate sequential numbers if missing
-        if clean_df['Number'].isna().all() or (clean_df['Number'].astype(str) == '').all():
-            clean_df['Number'] = range(1, len(clean_df) + 1)
-            
-        # Save the cleaned dataframe
-        print(f"Saving cleaned CSV to {output_file}")
-        clean_df.to_csv(output_file, index=False, quoting=1)  # Use quoting for all text fields
-        
-        print(f"Cleaned CSV has {len(clean_df)} rows and {len(clean_df.columns)} columns")
-        return True
-        
-    except Exception as e:
+        # utf-8-sig drops the byte order mark Excel writes at the start of CSV UTF-8 files
+        with open(input_file, 'r', newline='', encoding='utf-8-sig') as f:
+            header = next(csv.reader(f), [])
+    except _READ_WRITE_ERRORS as e:
+        print(f"Error reading CSV: {str(e)}")
+        return False
+    print(f"Original CSV has {len(header)} columns")
+    
+    chosen_sources, log_lines = choose_sources(header)
+    
+    # Display the original column names and the mapping in a single write
+    if verbose:
+        print("Original columns:\n" + "\n".join(f"  - {col}" for col in header))
+        print("\n".join(log_lines))
+    
+    # Stream the file through PyArrow in batches when available
+    print(f"Saving cleaned CSV to {output_file}")
+    try:
+        if pa is not None:
+            row_count = stream_clean_csv(input_file, output_file, chosen_sources, STANDARD_COLUMNS)
+        else:
+            row_count = pandas_clean_csv(input_file, output_file, chosen_sources)
+    except _READ_WRITE_ERRORS as e:
         print(f"Error cleaning CSV: {str(e)}")
         return False
+    
+    print(f"Cleaned CSV has {row_count} rows and {len(STANDARD_COLUMNS)} columns")
+    return True
 
 if __name__ == "__main__":
-    # Allow specifying input and output files via command line arguments
-    input_file = 'data/sds_register.csv'
-    output_file = None
-    
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
+    parser = argparse.ArgumentParser(description="Clean and standardize SDS register CSV files.")
+    parser.add_argument("input_file", nargs="?", default='data/sds_register.csv', help="CSV file to clean")
+    parser.add_argument("output_file", nargs="?", default=None, help="Where to save the cleaned CSV (defaults to overwriting the input)")
+    parser.add_argument("--glob", dest="pattern", help="Clean every CSV file matching this pattern in place, e.g. 'data/*.csv'")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of files to clean in parallel with --glob")
+    args = parser.parse_args()
     
-    clean_csv_register(input_file, output_file)
\ No newline at end of file
+    if args.pattern:
+        # Files are independent, so clean them in separate processes
+        files = sorted(glob.glob(args.pattern))
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(clean_csv_register, files))
+        print(f"Cleaned {sum(results)} of {len(files)} files")
+    else:
+        clean_csv_register(args.input_file, args.output_file, verbose=True)
@@ -1,9 +1,109 @@
 import io
 import os
 import base64
+import datetime
+import logging
+import numpy as np
 import pandas as pd
 from typing import Optional, List
 
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Text columns use Arrow-backed strings and CSV exports are written by PyArrow when it is installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+STRING_DTYPE = "string[pyarrow]" if pa is not None else "string"
+
+# Standard columns we want in the export (in order)
+EXPORT_COLUMNS = (
+    'Number',
+    'Product Name',
+    'Supplier/Manufacturer',
+    'CAS Number',
+    'Chemical ID',
+    'Location',
+    'SDS Available',
+    'Issue Date',
+    'Health Hazards',
+    'Health Category',
+    'Physical Hazards',
+    'Physical Category',
+    'Hazardous Substance',
+    'Flash Point (Deg C)',
+    'Dangerous Goods Class',
+    'Description',
+    'Packing Group',
+    'Appearance',
+    'Colour',
+    'Odour',
+    'First Aid Measures',
+    'Firefighting Measures',
+    'Storage Use',
+    'Environmental Hazards',
+    'Source File',
+    'Last Updated Date'
+)
+
+# Map from lowercase/snake_case to our standard column names
+_EXPORT_COLUMN_MAPPING = {
+    'number': 'Number',
+    'product_name': 'Product Name',
+    'Product Name': 'Product Name',
+    'supplier_manufacturer': 'Supplier/Manufacturer',
+    'Supplier/Manufacturer': 'Supplier/Manufacturer',
+    'cas_number': 'CAS Number',
+    'CAS Number': 'CAS Number',
+    'Chemical Identification': 'Chemical ID',
+    'hazardous_substance': 'Hazardous Substance',
+    'hazards': 'Hazards',
+    'health_hazards': 'Health Hazards',
+    'Health Hazards': 'Health Hazards',
+    'health_category': 'Health Category',
+    'Health Category': 'Health Category',
+    'physical_hazards': 'Physical Hazards',
+    'Physical Hazards': 'Physical Hazards',
+    'physical_category': 'Physical Category',
+    'Physical Category': 'Physical Category',
+    'flash_point': 'Flash Point (Deg C)',
+    'Flash Point': 'Flash Point (Deg C)',
+    'dangerous_goods_class': 'Dangerous Goods Class',
+    'description': 'Description',
+    'packing_group': 'Packing Group',
+    'appearance': 'Appearance',
+    'Appearance': 'Appearance',
+    'colour': 'Colour',
+    'Colour': 'Colour',
+    'odour': 'Odour',
+    'Odour': 'Odour',
+    'location': 'Location',
+    'sds_available': 'SDS Available',
+    'issue_date': 'Issue Date',
+    'first_aid_measures': 'First Aid Measures',
+    'First Aid Measures': 'First Aid Measures',
+    'firefighting_measures': 'Firefighting Measures',
+    'Firefighting Measures': 'Firefighting Measures',
+    'Storage Use': 'Storage Use',
+    'Environmental Hazards': 'Environmental Hazards',
+    'Source File': 'Source File',
+    'Last Updated Date': 'Last Updated Date'
+}
+
+# Source columns for each export column, in order of preference: the exact column name,
+# then other title case names, then snake_case names
+_EXPORT_SOURCES_BY_TARGET = {
+    target: tuple(sorted(
+        (source for source, mapped in _EXPORT_COLUMN_MAPPING.items() if mapped == target),
+        key=lambda source: (source != target, not source[0].isupper())
+    ))
+    for target in EXPORT_COLUMNS
+}
+
 def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Process the dataframe for display and export.
@@ -14,9 +114,6 @@ def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         A processed dataframe
     """
-    # Make a copy to avoid modifying the original
-    processed_df = df.copy()
-    
     # Define the expected columns based on the SDS Register template
     template_columns = [
         'Number', 'Product Name', 'Supplier/Manufacturer', 'Quantity', 'Location', 
@@ -52,40 +149,43 @@ def process_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         'Desciption': 'Description'
     }
     
-    # Rename columns according to the mapping
+    # Work out the renames in mapping order, so only the first source found claims each
+    # template column, then apply them all at once (rename returns a new frame, so the
+    # original is left untouched)
+    columns = set(df.columns)
+    renames = {}
     for old_col, new_col in column_mapping.items():
-        if old_col in processed_df.columns and new_col not in processed_df.columns:
-            processed_df = processed_df.rename(columns={old_col: new_col})
+        if old_col in columns and new_col not in columns:
+            renames[old_col] = new_col
+            columns.discard(old_col)
+            columns.add(new_col)
+    processed_df = df.rename(columns=renames)
     
     # Ensure all required columns exist
-    for col in template_columns:
-        if col not in processed_df.columns:
-            processed_df[col] = ''
+    missing_columns = [col for col in template_columns if col not in columns]
+    if missing_columns:
+        processed_df = pd.concat([processed_df, pd.DataFrame('', index=df.index, columns=missing_columns)], axis=1)
     
     # If Number column is missing or empty, create it
-    if 'Number' not in processed_df.columns or processed_df['Number'].isna().all() or (processed_df['Number'] == '').all():
-        processed_df['Number'] = range(1, len(processed_df) + 1)
-    
-    # Fill NA/None values with empty strings
-    processed_df = processed_df.fillna('')
+    # (a column that was just added is known to be empty, so skip scanning it)
+    if 'Number' in missing_columns or processed_df['Number'].isna().all() or (processed_df['Number'] == '').all():
+        processed_df['Number'] = np.arange(1, len(processed_df) + 1, dtype=np.int64)
     
-    # Convert all values to strings
-    for col in processed_df.columns:
-        processed_df[col] = processed_df[col].astype(str)
-    
-    # Clean up whitespace
-    for col in processed_df.columns:
-        processed_df[col] = processed_df[col].str.strip()
+    # Fill NA/None values with empty strings, convert all values to strings and
+    # clean up whitespace, each as a single frame-level step
+    processed_df = processed_df.fillna('').astype(STRING_DTYPE)
+    processed_df = processed_df.apply(lambda column: column.str.strip())
     
     # Set default SDS Available to 'Yes' if empty
     if 'SDS Available' in processed_df.columns:
-        processed_df.loc[processed_df['SDS Available'] == '', 'SDS Available'] = 'Yes'
+        sds_available = processed_df['SDS Available']
+        processed_df['SDS Available'] = sds_available.mask(sds_available == '', 'Yes')
     
     # Set default Issue Date to current date if empty
     if 'Issue Date' in processed_df.columns:
-        import datetime
-        today = datetime.datetime.now().strftime('%Y-%m-%d')
-        processed_df.loc[processed_df['Issue Date'] == '', 'Issue Date'] = today
+        today = datetime.date.today().isoformat()
+        issue_date = processed_df['Issue Date']
+        processed_df['Issue Date'] = issue_date.mask(issue_date == '', today)
     
     # Reorder columns to exactly match template order
     final_columns = []
@@ -115,7 +215,79 @@ def filter_dataframe(df: pd.DataFrame, column: str, value: Optional[str] = None)
     if value is None or value == "All" or column not in df.columns:
         return df
     
-    return df[df[column] == value]
+    return df[get_filter_mask(df[column], value)]
+
+def get_filter_mask(series: pd.Series, value: str) -> np.ndarray:
+    """
+    Boolean mask of the rows of a column equal to a value.
+    
+    Categorical columns are compared on their integer codes rather than their strings.
+    
+    Args:
+        series: The column to filter on
+        value: The value to keep
+        
+    Returns:
+        NumPy boolean array, False where the column is missing
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if value not in series.cat.categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == series.cat.categories.get_loc(value)
+    return series.eq(value).to_numpy(dtype=bool, na_value=False)
+
+# Mis-decoded UTF-8 sequences (e.g. "â€™" for a curly apostrophe), fixed before single characters.
+# The bare "â€" prefix comes last so it catches the variants not listed before it
+_MOJIBAKE_REPLACEMENTS = (
+    ('â€"', '-'),
+    ('â€™', "'"),
+    ('â€œ', '"'),
+    ('â€', '"'),
+)
+
+# Single-character substitutions; none of the replacements contain another key, so order doesn't matter
+_CHARACTER_REPLACEMENTS = tuple({
+    # Dashes, quotes, spaces and punctuation
+    '\u2013': '-',         # en dash
+    '\u2014': '-',         # em dash (using single hyphen for consistency)
+    '\u2018': "'",         # curly quotes
+    '\u2019': "'",
+    '\u201c': '"',
+    '\u201d': '"',
+    '\u00a0': ' ',         # non-breaking space
+    '\u2022': '*',         # bullet point
+    '\u2026': '...',       # ellipsis
+    
+    # Degree symbol and the stray Â left by mis-decoding it
+    '\u00c2': '',
+    '\u00b0': '',
+    
+    # Chemical subscripts and superscripts
+    '₀': '0', '₁': '1', '₂': '2', '₃': '3', '₄': '4',
+    '₅': '5', '₆': '6', '₇': '7', '₈': '8', '₉': '9',
+    '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4',
+    '⁵': '5', '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9',
+    '⁻': '-',
+    
+    # Other common special characters
+    '±': '+/-',
+    '×': 'x',
+    '÷': '/',
+    'µ': 'u',               # micro symbol to u
+    '®': '(R)',             # Registered trademark
+    '™': '(TM)',            # Trademark
+    '©': '(c)',             # Copyright
+    
+    # Latin characters
+    'á': 'a',
+    'é': 'e',
+    'í': 'i',
+    'ó': 'o',
+    'ú': 'u',
+    'ñ': 'n',
+}.items())
+
+_SPECIAL_CHARACTER_REPLACEMENTS = _MOJIBAKE_REPLACEMENTS + _CHARACTER_REPLACEMENTS
 
 def clean_special_characters(text: str) -> str:
     """
@@ -131,94 +303,46 @@ def clean_special_characters(text: str) -> str:
     if not isinstance(text, str):
         return str(text)
     
-    # First handle common UTF-8 encoding issues
-    # Fix common UTF-8 encoding problems like "â€""
+    # Every character handled below is non-ASCII, so plain ASCII text needs no work
+    if text.isascii():
+        return text
+    
+    # First fix common UTF-8 encoding problems like "â€™", then the single special characters.
+    # The membership checks are much cheaper than a replace pass over text that doesn't need it
     cleaned = text
+    for broken, fixed in _SPECIAL_CHARACTER_REPLACEMENTS:
+        if broken in cleaned:
+            cleaned = cleaned.replace(broken, fixed)
+    
+    return cleaned
+
+def clean_special_characters_series(series: pd.Series) -> pd.Series:
+    """
+    Clean and normalize special characters across a whole column at once.
+    Vectorized equivalent of applying clean_special_characters to each value.
     
-    # Fix em-dash encoding issues (â€")
-    cleaned = cleaned.replace('â€"', '-')
-    cleaned = cleaned.replace('â€"', '-')  # Another variant
-    cleaned = cleaned.replace('â€"', '-')
-    
-    # Fix other encoding issues
-    cleaned = cleaned.replace('â€™', "'")
-    cleaned = cleaned.replace('â€œ', '"')
-    cleaned = cleaned.replace('â€', '"')
-    cleaned = cleaned.replace('â€¦', '...')
-    cleaned = cleaned.replace('â€¢', '*')  # Bullet point
-    cleaned = cleaned.replace('â€¡', '‡')
-    
-    # Handle UTF-8 special character replacements
-    cleaned = cleaned.replace('\u2013', '-')          # en dash
-    cleaned = cleaned.replace('\u2014', '-')          # em dash (using single hyphen for consistency)
-    cleaned = cleaned.replace('\u2018', "'")          # curly quotes
-    cleaned = cleaned.replace('\u2019', "'")
-    cleaned = cleaned.replace('\u201c', '"')
-    cleaned = cleaned.replace('\u201d', '"')
-    cleaned = cleaned.replace('\u00a0', ' ')          # non-breaking space
-    cleaned = cleaned.replace('\u2022', '*')          # bullet point
-    cleaned = cleaned.replace('\u2026', '...')        # ellipsis
-    
-    # Fix degree symbol and related issues
-    cleaned = cleaned.replace('\u00c2', '')           # Remove Â character
-    cleaned = cleaned.replace('\u00b0', '')           # Remove ° character
-    cleaned = cleaned.replace('°C', ' C')             # Replace degree C with space C
-    cleaned = cleaned.replace('°F', ' F')             # Replace degree F with space F
-    cleaned = cleaned.replace('Â°C', ' C')            # Replace encoded degree C
-    cleaned = cleaned.replace('Â°F', ' F')            # Replace encoded degree F
-    
-    # Handle special quotes and apostrophes
-    cleaned = cleaned.replace('â€™', "'")
-    cleaned = cleaned.replace('â€˜', "'")
-    cleaned = cleaned.replace('â€œ', '"')
-    cleaned = cleaned.replace('â€', '"')
-    
-    # Handle chemical subscripts and superscripts
-    cleaned = cleaned.replace('₂', '2')
-    cleaned = cleaned.replace('₃', '3')
-    cleaned = cleaned.replace('₄', '4')
-    cleaned = cleaned.replace('₅', '5')
-    cleaned = cleaned.replace('₆', '6')
-    cleaned = cleaned.replace('₈', '8')
-    cleaned = cleaned.replace('₁', '1')
-    cleaned = cleaned.replace('₇', '7')
-    cleaned = cleaned.replace('₉', '9')
-    cleaned = cleaned.replace('₀', '0')
-    
-    cleaned = cleaned.replace('¹', '1')
-    cleaned = cleaned.replace('²', '2')
-    cleaned = cleaned.replace('³', '3')
-    cleaned = cleaned.replace('⁴', '4')
-    cleaned = cleaned.replace('⁵', '5')
-    cleaned = cleaned.replace('⁶', '6')
-    cleaned = cleaned.replace('⁷', '7')
-    cleaned = cleaned.replace('⁸', '8')
-    cleaned = cleaned.replace('⁹', '9')
-    cleaned = cleaned.replace('⁰', '0')
-    cleaned = cleaned.replace('⁻', '-')
-    
-    # Handle common chemical formulas
-    cleaned = cleaned.replace('(NH₄)₂S₂O₈', '(NH4)2S2O8')
-    
-    # Fix specific temperature values that might appear in Flash Point field
-    cleaned = cleaned.replace('91Â°C', '91 C')
-    
-    # Fix other common special characters
-    cleaned = cleaned.replace('±', '+/-')
-    cleaned = cleaned.replace('×', 'x')
-    cleaned = cleaned.replace('÷', '/')
-    cleaned = cleaned.replace('µ', 'u')    # micro symbol to u
-    cleaned = cleaned.replace('®', '(R)')  # Registered trademark
-    cleaned = cleaned.replace('™', '(TM)') # Trademark
-    cleaned = cleaned.replace('©', '(c)')  # Copyright
-    
-    # Fix Latin characters
-    cleaned = cleaned.replace('á', 'a')
-    cleaned = cleaned.replace('é', 'e')
-    cleaned = cleaned.replace('í', 'i')
-    cleaned = cleaned.replace('ó', 'o')
-    cleaned = cleaned.replace('ú', 'u')
-    cleaned = cleaned.replace('ñ', 'n')
+    Args:
+        series: The column to clean
+        
+    Returns:
+        The column as strings with normalized special characters
+    """
+    cleaned = series.astype(STRING_DTYPE)
+    
+    # Only values with non-ASCII characters can need any of the replacements
+    needs_cleaning = cleaned.str.contains(r'[^\x00-\x7f]', regex=True, na=False)
+    if not needs_cleaning.any():
+        return cleaned
+    
+    subset = cleaned[needs_cleaning]
+    uniques = subset.unique()
+    if len(uniques) * 2 <= len(subset):
+        # Values repeat across rows (hazard phrases, supplier names), so clean each distinct one once
+        subset = subset.map({value: clean_special_characters(value) for value in uniques})
+    else:
+        for broken, fixed in _SPECIAL_CHARACTER_REPLACEMENTS:
+            subset = subset.str.replace(broken, fixed, regex=False)
+    cleaned[needs_cleaning] = subset
     
     return cleaned
 
@@ -233,9 +357,9 @@ def convert_complex_types_to_string(value):
         A string representation of the value
     """
     if isinstance(value, dict):
-        return '; '.join([f"{k}: {v}" for k, v in value.items() if v])
+        return '; '.join(f"{k}: {v}" for k, v in value.items() if v)
     elif isinstance(value, list):
-        return '; '.join([str(item) for item in value if item])
+        return '; '.join(str(item) for item in value if item)
     else:
         return str(value) if value is not None else ''
 
@@ -251,177 +375,117 @@ def clean_nan_values(df):
     Returns:
         The cleaned dataframe
     """
+    # Categorical columns can't take '' as a new value, so clean them as plain values
+    categorical_columns = df.select_dtypes(include='category').columns
+    if len(categorical_columns):
+        df = df.astype({col: object for col in categorical_columns})
+    
     # First replace all NaN values with empty strings
     df = df.fillna('')
     
     # Then clean any string representations of 'nan' or 'None'
     for col in df.columns:
-        # Replace with empty string if value is a string 'nan' or 'None'
-        df[col] = df[col].apply(lambda x: '' if str(x).lower() == 'nan' or str(x).lower() == 'none' else x)
+        is_placeholder = df[col].astype(str).str.lower().isin(('nan', 'none'))
+        if is_placeholder.any():
+            df[col] = df[col].mask(is_placeholder, '')
     
     return df
 
-def generate_excel(df: pd.DataFrame) -> io.BytesIO:
+def _build_export_frame(df: pd.DataFrame, label: str) -> pd.DataFrame:
     """
-    Generate a completely fresh Excel file from extracted data.
-    Uses only the available fields from the extraction process and places them
-    in column A onward.
+    Build the cleaned export dataframe shared by the Excel and CSV exports.
+    Takes the best version of each standard column and cleans NaN values,
+    complex types and special characters.
     
     Args:
         df: The dataframe with extracted SDS data
+        label: Name of the export format, used in the debug output
         
     Returns:
-        BytesIO object containing the Excel file
+        The export dataframe with the standard columns as strings
     """
-    # Debug information
-    print("EXCEL EXPORT DEBUG INFO:")
-    print(f"Input DataFrame shape: {df.shape}")
-    print(f"Input DataFrame columns: {list(df.columns)}")
-    
-    # Create a completely new DataFrame with consistent column names
-    # We'll merge both lowercase and titlecase versions of the same data
-    export_df = pd.DataFrame()
-    
-    # Standard columns we want in the output (in order)
-    standard_columns = [
-        'Number',
-        'Product Name',
-        'Supplier/Manufacturer',
-        'CAS Number',
-        'Chemical ID',
-        'Location',
-        'SDS Available',
-        'Issue Date',
-        'Health Hazards',
-        'Health Category',
-        'Physical Hazards',
-        'Physical Category',
-        'Hazardous Substance',
-        'Flash Point (Deg C)',
-        'Dangerous Goods Class',
-        'Description',
-        'Packing Group',
-        'Appearance',
-        'Colour',
-        'Odour',
-        'First Aid Measures',
-        'Firefighting Measures',
-        'Storage Use',
-        'Environmental Hazards',
-        'Source File',
-        'Last Updated Date'
-    ]
-    
-    # APPROACH COMPLETELY CHANGED: Start with an empty dataframe
-    # and only copy fields we want, taking the best version of each field
-    export_df = pd.DataFrame(index=df.index, columns=standard_columns)
-    
     # Make a copy and clean NaN values using our dedicated function
     df_clean = clean_nan_values(df.copy())
     
     # First convert any dictionaries or complex data types to strings
     for col in df_clean.columns:
-        df_clean[col] = df_clean[col].apply(convert_complex_types_to_string)
-    
-    # Map from lowercase/snake_case to our standard column names
-    column_mapping = {
-        'number': 'Number',
-        'product_name': 'Product Name',
-        'Product Name': 'Product Name',
-        'supplier_manufacturer': 'Supplier/Manufacturer',
-        'Supplier/Manufacturer': 'Supplier/Manufacturer',
-        'cas_number': 'CAS Number',
-        'CAS Number': 'CAS Number',
-        'Chemical Identification': 'Chemical ID',
-        'hazardous_substance': 'Hazardous Substance',
-        'hazards': 'Hazards',
-        'health_hazards': 'Health Hazards',
-        'Health Hazards': 'Health Hazards',
-        'health_category': 'Health Category',
-        'Health Category': 'Health Category',
-        'physical_hazards': 'Physical Hazards',
-        'Physical Hazards': 'Physical Hazards',
-        'physical_category': 'Physical Category',
-        'Physical Category': 'Physical Category',
-        'flash_point': 'Flash Point (Deg C)',
-        'Flash Point': 'Flash Point (Deg C)',
-        'dangerous_goods_class': 'Dangerous Goods Class',
-        'description': 'Description',
-        'packing_group': 'Packing Group',
-        'appearance': 'Appearance',
-        'Appearance': 'Appearance',
-        'colour': 'Colour',
-        'Colour': 'Colour',
-        'odour': 'Odour',
-        'Odour': 'Odour',
-        'location': 'Location',
-        'sds_available': 'SDS Available',
-        'issue_date': 'Issue Date',
-        'first_aid_measures': 'First Aid Measures',
-        'First Aid Measures': 'First Aid Measures',
-        'firefighting_measures': 'Firefighting Measures',
-        'Firefighting Measures': 'Firefighting Measures',
-        'Storage Use': 'Storage Use',
-        'Environmental Hazards': 'Environmental Hazards',
-        'Source File': 'Source File', 
-        'Last Updated Date': 'Last Updated Date'
-    }
-    
-    # Now go through our mapping and copy data to the export dataframe
-    # For each target column, look for the best source column to use
-    for target_col in standard_columns:
-        # Find all possible source columns that map to this target
-        sources = [source for source, target in column_mapping.items() if target == target_col and source in df_clean.columns]
+        # Columns holding only strings (the usual case after extraction) need no conversion
+        if pd.api.types.infer_dtype(df_clean[col], skipna=False) == 'string':
+            continue
+        df_clean[col] = df_clean[col].map(convert_complex_types_to_string)
+    df_clean = df_clean.astype(STRING_DTYPE)
+    
+    # For each target column, use the first available source in order of preference
+    available_columns = set(df_clean.columns)
+    chosen_sources = {}
+    for target_col in EXPORT_COLUMNS:
+        chosen_source = next((source for source in _EXPORT_SOURCES_BY_TARGET[target_col] if source in available_columns), None)
         
-        if not sources:
+        if chosen_source is None:
             # No matching columns found, leave empty
             continue
-            
-        # Prefer title case over snake_case if both exist
-        title_case_sources = [s for s in sources if s[0].isupper()]
-        snake_case_sources = [s for s in sources if not s[0].isupper()]
         
-        # Choose the source based on preference
-        if title_case_sources:
-            # Prefer the exact match of the column name if available
-            if target_col in title_case_sources:
-                chosen_source = target_col
-            else:
-                chosen_source = title_case_sources[0]
-        elif snake_case_sources:
-            chosen_source = snake_case_sources[0]
-        else:
-            # Use any available source
-            chosen_source = sources[0]
-        
-        # Copy the data from chosen source
-        print(f"Excel: Using '{chosen_source}' as source for '{target_col}'")
-        export_df[target_col] = df_clean[chosen_source]
+        logger.debug("%s: Using '%s' as source for '%s'", label, chosen_source, target_col)
+        chosen_sources[target_col] = chosen_source
+    
+    # Build the export dataframe in one go, taking the best version of each field;
+    # targets without a source are left empty
+    export_df = pd.DataFrame(
+        {target_col: df_clean[source] for target_col, source in chosen_sources.items()},
+        index=df_clean.index,
+        columns=list(EXPORT_COLUMNS)
+    )
+    
+    # Assign sequential numbers if missing (a Number column without a source is known to be empty)
+    if 'Number' not in chosen_sources or export_df['Number'].isna().all() or (export_df['Number'] == '').all():
+        export_df['Number'] = np.arange(1, len(export_df) + 1, dtype=np.int64)
+    export_df = export_df.astype(STRING_DTYPE)
+    
+    # Clean data to prevent encoding issues
+    for col in export_df.columns:
+        # Use our dedicated special character cleaning function
+        export_df[col] = clean_special_characters_series(export_df[col])
+    
+    # Final cleanup - make absolutely sure there are no NaN values
+    export_df = clean_nan_values(export_df)
+    
+    return export_df
+
+def generate_excel(df: pd.DataFrame) -> io.BytesIO:
+    """
+    Generate a completely fresh Excel file from extracted data.
+    Uses only the available fields from the extraction process and places them
+    in column A onward.
     
-    # Assign sequential numbers if missing
-    if export_df['Number'].isna().all() or (export_df['Number'] == '').all():
-        export_df['Number'] = range(1, len(export_df) + 1)
+    Args:
+        df: The dataframe with extracted SDS data
+        
+    Returns:
+        BytesIO object containing the Excel file
+    """
+    # Debug information
+    logger.debug("EXCEL EXPORT DEBUG INFO:")
+    logger.debug("Input DataFrame shape: %s", df.shape)
+    logger.debug("Input DataFrame columns: %s", list(df.columns))
     
     # Create a BytesIO object to store the Excel file
     output = io.BytesIO()
     
     try:
-        # Clean data to prevent encoding issues
-        for col in export_df.columns:
-            # Use our dedicated special character cleaning function
-            export_df[col] = export_df[col].apply(clean_special_characters)
+        # Build the cleaned export dataframe
+        export_df = _build_export_frame(df, "Excel")
         
-        # Final cleanup - make absolutely sure there are no NaN values
-        export_df = clean_nan_values(export_df)
-        
-        # Create an Excel writer with option to handle NaN/Inf values
-        with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {'nan_inf_to_errors': True}}) as writer:
-            # Write the dataframe to Excel without the index
-            export_df.to_excel(writer, sheet_name='SDS Register', index=False)
-            
-            # Get the xlsxwriter workbook and worksheet objects
+        # Create an Excel writer with option to handle NaN/Inf values. Constant
+        # memory mode flushes each row to disk as it is written, so rows must be
+        # written strictly in order
+        with pd.ExcelWriter(output, engine='xlsxwriter', engine_kwargs={'options': {
+            'nan_inf_to_errors': True,
+            'constant_memory': True,
+            'strings_to_urls': False
+        }}) as writer:
+            # Get the xlsxwriter workbook and create the worksheet directly
             workbook = writer.book
-            worksheet = writer.sheets['SDS Register']
+            worksheet = workbook.add_worksheet('SDS Register')
             
             # Add a header format
             header_format = workbook.add_format({
@@ -439,10 +503,6 @@ def generate_excel(df: pd.DataFrame) -> io.BytesIO:
                 'border': 1
             })
             
-            # Apply the header format to the header row
-            for col_num, value in enumerate(export_df.columns.values):
-                worksheet.write(0, col_num, value, header_format)
-            
             # Set column widths - more specific to match template
             column_widths = {
                 'Number': 8,
@@ -475,17 +535,16 @@ def generate_excel(df: pd.DataFrame) -> io.BytesIO:
                 else:
                     worksheet.set_column(i, i, 15)  # Default width
             
-            # Add data with formatting
-            for row_num in range(1, len(export_df) + 1):
-                for col_num, col_name in enumerate(export_df.columns):
-                    cell_value = export_df.iloc[row_num-1, col_num]
-                    worksheet.write(row_num, col_num, cell_value, data_format)
+            # Write the formatted header row, then the data rows in order
+            worksheet.write_row(0, 0, export_df.columns, header_format)
+            for row_num, row in enumerate(export_df.itertuples(index=False, name=None), start=1):
+                worksheet.write_row(row_num, 0, row, data_format)
         
         # Seek to the beginning of the stream
         output.seek(0)
         
     except Exception as e:
-        print(f"Error generating Excel file: {e}")
+        logger.error(f"Error generating Excel file: {e}")
         # Return an empty BytesIO if there was an error
         output = io.BytesIO()
         output.write(b"Error generating Excel file")
@@ -505,154 +564,32 @@ def generate_csv(df: pd.DataFrame) -> io.StringIO:
         StringIO object containing the CSV file
     """
     # Debug information
-    print("CSV EXPORT DEBUG INFO:")
-    print(f"Input DataFrame shape: {df.shape}")
-    print(f"Input DataFrame columns: {list(df.columns)}")
-    
-    # Create a completely new DataFrame with consistent column names
-    # We'll merge both lowercase and titlecase versions of the same data
-    export_df = pd.DataFrame()
-    
-    # Standard columns we want in the output (in order)
-    standard_columns = [
-        'Number',
-        'Product Name',
-        'Supplier/Manufacturer',
-        'CAS Number',
-        'Chemical ID',
-        'Location',
-        'SDS Available',
-        'Issue Date',
-        'Health Hazards',
-        'Health Category',
-        'Physical Hazards',
-        'Physical Category',
-        'Hazardous Substance',
-        'Flash Point (Deg C)',
-        'Dangerous Goods Class',
-        'Description',
-        'Packing Group',
-        'Appearance',
-        'Colour',
-        'Odour',
-        'First Aid Measures',
-        'Firefighting Measures',
-        'Storage Use',
-        'Environmental Hazards',
-        'Source File',
-        'Last Updated Date'
-    ]
-    
-    # APPROACH COMPLETELY CHANGED: Start with an empty dataframe
-    # and only copy fields we want, taking the best version of each field
-    export_df = pd.DataFrame(index=df.index, columns=standard_columns)
-    
-    # Make a copy and clean NaN values using our dedicated function
-    df_clean = clean_nan_values(df.copy())
-    
-    # First convert any dictionaries or complex data types to strings
-    for col in df_clean.columns:
-        df_clean[col] = df_clean[col].apply(convert_complex_types_to_string)
-    
-    # Map from lowercase/snake_case to our standard column names
-    column_mapping = {
-        'number': 'Number',
-        'product_name': 'Product Name',
-        'Product Name': 'Product Name',
-        'supplier_manufacturer': 'Supplier/Manufacturer',
-        'Supplier/Manufacturer': 'Supplier/Manufacturer',
-        'cas_number': 'CAS Number',
-        'CAS Number': 'CAS Number',
-        'Chemical Identification': 'Chemical ID',
-        'hazardous_substance': 'Hazardous Substance',
-        'hazards': 'Hazards',
-        'health_hazards': 'Health Hazards',
-        'Health Hazards': 'Health Hazards',
-        'health_category': 'Health Category',
-        'Health Category': 'Health Category',
-        'physical_hazards': 'Physical Hazards',
-        'Physical Hazards': 'Physical Hazards',
-        'physical_category': 'Physical Category',
-        'Physical Category': 'Physical Category',
-        'flash_point': 'Flash Point (Deg C)',
-        'Flash Point': 'Flash Point (Deg C)',
-        'dangerous_goods_class': 'Dangerous Goods Class',
-        'description': 'Description',
-        'packing_group': 'Packing Group',
-        'appearance': 'Appearance',
-        'Appearance': 'Appearance',
-        'colour': 'Colour',
-        'Colour': 'Colour',
-        'odour': 'Odour',
-        'Odour': 'Odour',
-        'location': 'Location',
-        'sds_available': 'SDS Available',
-        'issue_date': 'Issue Date',
-        'first_aid_measures': 'First Aid Measures',
-        'First Aid Measures': 'First Aid Measures',
-        'firefighting_measures': 'Firefighting Measures',
-        'Firefighting Measures': 'Firefighting Measures',
-        'Storage Use': 'Storage Use',
-        'Environmental Hazards': 'Environmental Hazards',
-        'Source File': 'Source File', 
-        'Last Updated Date': 'Last Updated Date'
-    }
-    
-    # Now go through our mapping and copy data to the export dataframe
-    # For each target column, look for the best source column to use
-    for target_col in standard_columns:
-        # Find all possible source columns that map to this target
-        sources = [source for source, target in column_mapping.items() if target == target_col and source in df_clean.columns]
-        
-        if not sources:
-            # No matching columns found, leave empty
-            continue
-            
-        # Prefer title case over snake_case if both exist
-        title_case_sources = [s for s in sources if s[0].isupper()]
-        snake_case_sources = [s for s in sources if not s[0].isupper()]
-        
-        # Choose the source based on preference
-        if title_case_sources:
-            # Prefer the exact match of the column name if available
-            if target_col in title_case_sources:
-                chosen_source = target_col
-            else:
-                chosen_source = title_case_sources[0]
-        elif snake_case_sources:
-            chosen_source = snake_case_sources[0]
-        else:
-            # Use any available source
-            chosen_source = sources[0]
-        
-        # Copy the data from chosen source
-        print(f"CSV: Using '{chosen_source}' as source for '{target_col}'")
-        export_df[target_col] = df_clean[chosen_source]
-    
-    # Assign sequential numbers if missing
-    if export_df['Number'].isna().all() or (export_df['Number'] == '').all():
-        export_df['Number'] = range(1, len(export_df) + 1)
+    logger.debug("CSV EXPORT DEBUG INFO:")
+    logger.debug("Input DataFrame shape: %s", df.shape)
+    logger.debug("Input DataFrame columns: %s", list(df.columns))
     
     # Create a StringIO object to store the CSV content
     output = io.StringIO()
     
     try:
-        # Clean data to prevent encoding issues
-        for col in export_df.columns:
-            # Use our dedicated special character cleaning function
-            export_df[col] = export_df[col].apply(clean_special_characters)
-        
-        # Final cleanup - make absolutely sure there are no NaN values
-        export_df = clean_nan_values(export_df)
+        # Build the cleaned export dataframe
+        export_df = _build_export_frame(df, "CSV")
         
         # Convert dataframe to CSV with all text fields quoted
-        export_df.to_csv(output, index=False, quoting=1)  # quoting=1 means quote all non-numeric fields
+        if pa is not None:
+            # Every export column is a string, so quoting all valid values quotes every field
+            buffer = io.BytesIO()
+            table = pa.Table.from_pandas(export_df, preserve_index=False)
+            pa_csv.write_csv(table, buffer, write_options=pa_csv.WriteOptions(quoting_style='all_valid'))
+            output.write(buffer.getvalue().decode('utf-8'))
+        else:
+            export_df.to_csv(output, index=False, quoting=1)  # quoting=1 means quote all non-numeric fields
         
         # Seek to the beginning of the stream
         output.seek(0)
         
     except Exception as e:
-        print(f"Error generating CSV file: {e}")
+        logger.error(f"Error generating CSV file: {e}")
         # Return an empty StringIO if there was an error
         output = io.StringIO()
         output.write("Error generating CSV file")
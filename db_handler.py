@@ -19,6 +19,123 @@ DB_DIR = "data"
 DB_FILE = os.path.join(DB_DIR, "sds_database.sqlite")
 DB_VERSION = 1
 
+# Map DataFrame columns to database columns, keeping them in their original format
+# Note: We've changed our approach to keep column names consistent throughout the app
+# This prevents duplication issues during export
+_COLUMN_MAPPING = {
+    # Standard snake_case columns defined in the schema
+    'number': 'number',
+    'product_name': 'product_name',
+    'supplier_manufacturer': 'supplier_manufacturer',
+    'hazards': 'hazards',
+    'location': 'location',
+    'sds_available': 'sds_available',
+    'issue_date': 'issue_date',
+    'health_hazards': 'health_hazards',
+    'health_category': 'health_category',
+    'physical_hazards': 'physical_hazards',
+    'physical_category': 'physical_category',
+    'hazardous_substance': 'hazardous_substance',
+    'flash_point': 'flash_point',
+    'dangerous_goods_class': 'dangerous_goods_class',
+    'description': 'description',
+    'packing_group': 'packing_group',
+    'appearance': 'appearance',
+    'colour': 'colour',
+    'odour': 'odour',
+    'cas_number': 'cas_number',
+    'first_aid_measures': 'first_aid_measures',
+    'firefighting_measures': 'firefighting_measures',
+    
+    # Alternative title-case keys - map to the same column names
+    'Number': 'number',
+    'Product Name': 'product_name',
+    'Supplier/Manufacturer': 'supplier_manufacturer',
+    'Hazards': 'hazards',
+    'Location': 'location',
+    'SDS Available': 'sds_available',
+    'Issue Date': 'issue_date',
+    'Health Hazards': 'health_hazards',
+    'Health Category': 'health_category',
+    'Physical Hazards': 'physical_hazards',
+    'Physical Category': 'physical_category',
+    'Hazardous Substance': 'hazardous_substance',
+    'Flash Point (Deg C)': 'flash_point',
+    'Dangerous Goods Class': 'dangerous_goods_class',
+    'Description': 'description',
+    'Packing Group': 'packing_group',
+    'Appearance': 'appearance',
+    'Colour': 'colour',
+    'Odour': 'odour',
+    'CAS Number': 'cas_number',
+    'First Aid Measures': 'first_aid_measures',
+    'Firefighting Measures': 'firefighting_measures'
+}
+
+# Register table columns written from a record, in a fixed order
+_DB_COLUMNS = list(dict.fromkeys(_COLUMN_MAPPING.values())) + ['additional_info']
+
+def _record_to_db_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a register record to a row for the sds_register table.
+    
+    Args:
+        record: Dictionary of DataFrame column names to values
+        
+    Returns:
+        Dict[str, Any]: Dictionary of database column names to values
+    """
+    # Prepare record with correct column names
+    db_record = {}
+    for df_col, db_col in _COLUMN_MAPPING.items():
+        if df_col in record:
+            # Serialize complex data types
+            value = record[df_col]
+            if isinstance(value, dict):
+                value = json.dumps(value)
+            elif isinstance(value, list):
+                value = "; ".join([str(item) for item in value])
+            elif pd.isna(value):
+                # Missing values in string and categorical columns bind as NULL
+                value = None
+            db_record[db_col] = value
+            
+    # Additional columns not in the mapping
+    for col in record:
+        if col not in _COLUMN_MAPPING.keys():
+            # Store any non-mapped columns in additional_info as JSON
+            if 'additional_info' not in db_record:
+                db_record['additional_info'] = json.dumps({})
+            
+            # Load existing additional_info, update it, and save back
+            additional_info = json.loads(db_record['additional_info'])
+            additional_info[col] = None if record[col] is pd.NA else record[col]
+            db_record['additional_info'] = json.dumps(additional_info)
+    
+    return db_record
+
+# Per-connection settings: WAL lets reads proceed during writes, and NORMAL sync is
+# safe in WAL mode while avoiding an fsync on every commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -64000",
+    "PRAGMA mmap_size = 30000000000",
+    "PRAGMA foreign_keys = ON",
+)
+
+class _OptimizingConnection(sqlite3.Connection):
+    """
+    SQLite connection that lets SQLite refresh its query planner statistics on close.
+    """
+    def close(self) -> None:
+        try:
+            self.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        super().close()
+
 def ensure_db_exists() -> None:
     """
     Ensure the database directory and file exist, creating them if necessary.
@@ -26,6 +143,17 @@ def ensure_db_exists() -> None:
     # Create data directory if it doesn't exist
     if not os.path.exists(DB_DIR):
         os.makedirs(DB_DIR)
+    
+    # Page size and auto-vacuum can only be chosen before the first table is created,
+    # so set them when creating a new database file; switching to WAL writes the header
+    if not os.path.exists(DB_FILE):
+        conn = sqlite3.connect(DB_FILE)
+        try:
+            conn.execute("PRAGMA page_size = 8192")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
 
 def get_connection() -> sqlite3.Connection:
     """
@@ -35,9 +163,9 @@ def get_connection() -> sqlite3.Connection:
         sqlite3.Connection: An active database connection
     """
     ensure_db_exists()
-    conn = sqlite3.connect(DB_FILE)
-    # Enable foreign keys
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn = sqlite3.connect(DB_FILE, factory=_OptimizingConnection)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 def initialize_database() -> Tuple[bool, str]:
@@ -105,6 +233,17 @@ def initialize_database() -> Tuple[bool, str]:
         )
         ''')
         
+        # Create table of AI batch jobs that haven't been merged into the register yet
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pending_batches (
+            batch_id TEXT PRIMARY KEY,
+            extraction_method TEXT,
+            status TEXT,
+            documents TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
         # Set the database version if it doesn't exist
         cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", 
                       ("db_version", str(DB_VERSION)))
@@ -139,84 +278,9 @@ def save_to_database(df: pd.DataFrame, history: List[Dict] = None) -> Tuple[bool
         # Convert DataFrame to list of dictionaries for insertion
         records = df.to_dict(orient='records')
         
-        # Map DataFrame columns to database columns, keeping them in their original format
-        # Note: We've changed our approach to keep column names consistent throughout the app
-        # This prevents duplication issues during export
-        column_mapping = {
-            # Standard snake_case columns defined in the schema
-            'number': 'number',
-            'product_name': 'product_name',
-            'supplier_manufacturer': 'supplier_manufacturer',
-            'hazards': 'hazards',
-            'location': 'location',
-            'sds_available': 'sds_available',
-            'issue_date': 'issue_date',
-            'health_hazards': 'health_hazards',
-            'health_category': 'health_category',
-            'physical_hazards': 'physical_hazards',
-            'physical_category': 'physical_category',
-            'hazardous_substance': 'hazardous_substance',
-            'flash_point': 'flash_point',
-            'dangerous_goods_class': 'dangerous_goods_class',
-            'description': 'description',
-            'packing_group': 'packing_group',
-            'appearance': 'appearance',
-            'colour': 'colour',
-            'odour': 'odour',
-            'cas_number': 'cas_number',
-            'first_aid_measures': 'first_aid_measures',
-            'firefighting_measures': 'firefighting_measures',
-            
-            # Alternative title-case keys - map to the same column names
-            'Number': 'number',
-            'Product Name': 'product_name',
-            'Supplier/Manufacturer': 'supplier_manufacturer',
-            'Hazards': 'hazards',
-            'Location': 'location',
-            'SDS Available': 'sds_available',
-            'Issue Date': 'issue_date',
-            'Health Hazards': 'health_hazards',
-            'Health Category': 'health_category',
-            'Physical Hazards': 'physical_hazards',
-            'Physical Category': 'physical_category',
-            'Hazardous Substance': 'hazardous_substance',
-            'Flash Point (Deg C)': 'flash_point',
-            'Dangerous Goods Class': 'dangerous_goods_class',
-            'Description': 'description',
-            'Packing Group': 'packing_group',
-            'Appearance': 'appearance',
-            'Colour': 'colour',
-            'Odour': 'odour',
-            'CAS Number': 'cas_number',
-            'First Aid Measures': 'first_aid_measures',
-            'Firefighting Measures': 'firefighting_measures'
-        }
-        
         # For each record, prepare and insert data
         for record in records:
-            # Prepare record with correct column names
-            db_record = {}
-            for df_col, db_col in column_mapping.items():
-                if df_col in record:
-                    # Serialize complex data types
-                    value = record[df_col]
-                    if isinstance(value, dict):
-                        value = json.dumps(value)
-                    elif isinstance(value, list):
-                        value = "; ".join([str(item) for item in value])
-                    db_record[db_col] = value
-                    
-            # Additional columns not in the mapping
-            for col in record:
-                if col not in column_mapping.keys():
-                    # Store any non-mapped columns in additional_info as JSON
-                    if 'additional_info' not in db_record:
-                        db_record['additional_info'] = json.dumps({})
-                    
-                    # Load existing additional_info, update it, and save back
-                    additional_info = json.loads(db_record['additional_info'])
-                    additional_info[col] = record[col]
-                    db_record['additional_info'] = json.dumps(additional_info)
+            db_record = _record_to_db_row(record)
             
             # Create placeholders for SQL query
             placeholders = ', '.join(['?'] * len(db_record))
@@ -434,6 +498,54 @@ def add_extraction_to_history(
         print(error_message)
         return False, error_message
 
+def add_extraction_history_bulk(entries: List[Dict]) -> Tuple[bool, str]:
+    """
+    Add several extraction entries to the history in a single transaction.
+    
+    Args:
+        entries: List of dictionaries with the add_extraction_to_history arguments
+            (filename, extraction_method, success, fields_extracted, additional_info)
+        
+    Returns:
+        Tuple[bool, str]: A tuple of (success, message)
+    """
+    if not entries:
+        return True, "No history entries to add"
+    
+    try:
+        conn = get_connection()
+        
+        # All entries of a batch share one timestamp
+        import datetime
+        timestamp = datetime.datetime.now().isoformat()
+        
+        rows = [
+            (
+                entry.get('filename', ''),
+                timestamp,
+                entry.get('extraction_method', ''),
+                1 if entry.get('success', False) else 0,
+                json.dumps(entry.get('fields_extracted') or {}),
+                json.dumps(entry.get('additional_info') or {})
+            )
+            for entry in entries
+        ]
+        
+        # Insert all history entries in a single transaction
+        with conn:
+            conn.executemany('''
+            INSERT INTO extraction_history 
+            (filename, timestamp, extraction_method, success, fields_extracted, additional_info)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+        conn.close()
+        
+        return True, f"Added {len(rows)} entries to extraction history"
+    except Exception as e:
+        error_message = f"Error updating extraction history: {e}"
+        print(error_message)
+        return False, error_message
+
 def get_extraction_history(limit: int = 100) -> List[Dict]:
     """
     Get the most recent extraction history entries.
@@ -488,5 +600,124 @@ def get_extraction_history(limit: int = 100) -> List[Dict]:
         print(f"Error getting extraction history: {e}")
         return []
 
+def add_pending_batch(batch_id: str, extraction_method: str, documents: Dict[str, str]) -> Tuple[bool, str]:
+    """
+    Record a submitted AI batch job so its results can be collected later.
+    
+    Args:
+        batch_id: The ID of the submitted batch
+        extraction_method: The method used for extraction
+        documents: Dictionary mapping each submitted filename to its text
+        
+    Returns:
+        Tuple[bool, str]: A tuple of (success, message)
+    """
+    try:
+        conn = get_connection()
+        conn.execute('''
+        INSERT OR REPLACE INTO pending_batches (batch_id, extraction_method, status, documents)
+        VALUES (?, ?, ?, ?)
+        ''', (batch_id, extraction_method, "pending", json.dumps(documents)))
+        conn.commit()
+        conn.close()
+        
+        return True, "Batch job recorded successfully"
+    except Exception as e:
+        error_message = f"Error recording batch job: {e}"
+        print(error_message)
+        return False, error_message
+
+def get_pending_batches() -> List[Dict]:
+    """
+    Get the AI batch jobs whose results haven't been collected yet.
+    
+    Returns:
+        List[Dict]: List of pending batch jobs with their submitted documents
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.execute('''
+        SELECT batch_id, extraction_method, documents, created_at
+        FROM pending_batches
+        WHERE status = 'pending'
+        ORDER BY created_at
+        ''')
+        
+        batches = []
+        for row in cursor:
+            try:
+                documents = json.loads(row[2]) if row[2] else {}
+            except (json.JSONDecodeError, TypeError):
+                documents = {}
+            
+            batches.append({
+                'batch_id': row[0],
+                'extraction_method': row[1],
+                'documents': documents,
+                'created_at': row[3]
+            })
+        
+        conn.close()
+        return batches
+    except Exception as e:
+        print(f"Error getting pending batches: {e}")
+        return []
+
+def update_batch_status(batch_id: str, status: str) -> Tuple[bool, str]:
+    """
+    Update the status of a recorded AI batch job.
+    
+    Args:
+        batch_id: The ID of the batch
+        status: The new status, e.g. "completed" or "failed"
+        
+    Returns:
+        Tuple[bool, str]: A tuple of (success, message)
+    """
+    try:
+        conn = get_connection()
+        conn.execute("UPDATE pending_batches SET status = ? WHERE batch_id = ?", (status, batch_id))
+        conn.commit()
+        conn.close()
+        
+        return True, "Batch status updated successfully"
+    except Exception as e:
+        error_message = f"Error updating batch status: {e}"
+        print(error_message)
+        return False, error_message
+
+def append_to_database(records: List[Dict]) -> Tuple[bool, str]:
+    """
+    Append new register records without rewriting the existing ones.
+    
+    Args:
+        records: List of register records to insert
+        
+    Returns:
+        Tuple[bool, str]: A tuple of (success, message)
+    """
+    try:
+        conn = get_connection()
+        
+        rows = []
+        for record in records:
+            db_record = _record_to_db_row(record)
+            rows.append([db_record.get(column) for column in _DB_COLUMNS])
+        
+        # Insert all rows in a single transaction
+        placeholders = ', '.join(['?'] * len(_DB_COLUMNS))
+        with conn:
+            conn.executemany(
+                f"INSERT INTO sds_register ({', '.join(_DB_COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+        conn.close()
+        
+        return True, f"Appended {len(rows)} records to SQLite database: {os.path.abspath(DB_FILE)}"
+    except Exception as e:
+        error_message = f"Error appending to database: {e}"
+        print(error_message)
+        return False, error_message
+
 # Initialize the database when the module is imported
 initialize_database()
\ No newline at end of file
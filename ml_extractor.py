@@ -10,12 +10,16 @@ import logging
 from typing import Dict, List, Optional, Tuple, Union, Any
 
 # Import base AI extractor functions
-from ai_extractor import get_api_status, ai_service, ai_client, extract_with_ai
+from ai_extractor import get_api_status, ai_service, ai_client, extract_with_ai, EXTRACTION_CACHE, ExtractionCache
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Patterns for pulling a JSON object out of a model response
+_CODEFENCE_RE = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_BRACE_RE = re.compile(r'({.*})', re.DOTALL)
+
 # Model configuration and selection
 ML_MODELS = {
     "openai": {
@@ -32,6 +36,16 @@ ML_MODELS = {
     }
 }
 
+# Fields every extraction result must contain
+_EXPECTED_FIELDS = (
+    "Product Name", "CAS Number", "Chemical Identification", 
+    "Health Hazards", "Health Category", "Physical Hazards", 
+    "Physical Category", "Flash Point", "Appearance", "Odour", 
+    "Colour", "Storage Use", "Supplier/Manufacturer", 
+    "Dangerous Goods Class", "Packing Group", "Environmental Hazards",
+    "First Aid Measures", "Firefighting Measures"
+)
+
 # Extraction strategies
 EXTRACTION_STRATEGIES = [
     "direct_extraction",
@@ -63,6 +77,21 @@ def get_ml_extraction_strategies() -> List[str]:
     """
     return EXTRACTION_STRATEGIES
 
+# Marks a combined result where one of the extraction passes failed, so it isn't cached
+_INCOMPLETE_KEY = "_incomplete"
+
+def _pass_failed(data: Dict[str, Any]) -> bool:
+    """
+    Check whether an extraction pass returned nothing or an error.
+    
+    Args:
+        data: Result of an extraction pass
+        
+    Returns:
+        True if the pass failed
+    """
+    return not data or "error" in data
+
 def specialized_hazard_extraction(text: str) -> Dict[str, Any]:
     """
     Specialized extraction of hazard information using domain-specific prompts.
@@ -122,7 +151,7 @@ def specialized_hazard_extraction(text: str) -> Dict[str, Any]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 hazard_data = json.loads(json_match.group(1))
             else:
@@ -130,7 +159,7 @@ def specialized_hazard_extraction(text: str) -> Dict[str, Any]:
                     hazard_data = json.loads(response_text)
                 except:
                     # Try to find a JSON-like structure
-                    potential_json = re.search(r'({.*})', response_text, re.DOTALL)
+                    potential_json = _BRACE_RE.search(response_text)
                     if potential_json:
                         try:
                             hazard_data = json.loads(potential_json.group(1))
@@ -202,7 +231,7 @@ def specialized_first_aid_extraction(text: str) -> Dict[str, Any]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 first_aid_data = json.loads(json_match.group(1))
             else:
@@ -210,7 +239,7 @@ def specialized_first_aid_extraction(text: str) -> Dict[str, Any]:
                     first_aid_data = json.loads(response_text)
                 except:
                     # Try to find a JSON-like structure
-                    potential_json = re.search(r'({.*})', response_text, re.DOTALL)
+                    potential_json = _BRACE_RE.search(response_text)
                     if potential_json:
                         try:
                             first_aid_data = json.loads(potential_json.group(1))
@@ -282,7 +311,7 @@ def specialized_firefighting_extraction(text: str) -> Dict[str, Any]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 firefighting_data = json.loads(json_match.group(1))
             else:
@@ -290,7 +319,7 @@ def specialized_firefighting_extraction(text: str) -> Dict[str, Any]:
                     firefighting_data = json.loads(response_text)
                 except:
                     # Try to find a JSON-like structure
-                    potential_json = re.search(r'({.*})', response_text, re.DOTALL)
+                    potential_json = _BRACE_RE.search(response_text)
                     if potential_json:
                         try:
                             firefighting_data = json.loads(potential_json.group(1))
@@ -365,7 +394,7 @@ def hierarchical_extraction(text: str) -> Dict[str, Any]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 sections = json.loads(json_match.group(1))
             else:
@@ -376,6 +405,7 @@ def hierarchical_extraction(text: str) -> Dict[str, Any]:
         
         # Now extract each field category separately
         results = extract_identification_info(text)
+        identification_failed = _pass_failed(results)
         
         # Add hazard information
         hazard_data = specialized_hazard_extraction(text)
@@ -419,6 +449,9 @@ def hierarchical_extraction(text: str) -> Dict[str, Any]:
             for key, value in phys_chem_data.items():
                 if key not in results or not results[key]:  # Don't overwrite existing values
                     results[key] = value
+        
+        if identification_failed or any(_pass_failed(data) for data in (hazard_data, first_aid_data, firefighting_data, phys_chem_data)):
+            results[_INCOMPLETE_KEY] = True
                     
     except Exception as e:
         logger.error(f"Error in hierarchical extraction: {str(e)}")
@@ -482,7 +515,7 @@ def extract_identification_info(text: str) -> Dict[str, str]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 identification_data = json.loads(json_match.group(1))
             else:
@@ -490,7 +523,7 @@ def extract_identification_info(text: str) -> Dict[str, str]:
                     identification_data = json.loads(response_text)
                 except:
                     # Try to find a JSON-like structure
-                    potential_json = re.search(r'({.*})', response_text, re.DOTALL)
+                    potential_json = _BRACE_RE.search(response_text)
                     if potential_json:
                         try:
                             identification_data = json.loads(potential_json.group(1))
@@ -564,7 +597,7 @@ def extract_physical_chemical_properties(text: str) -> Dict[str, str]:
             
             # Parse JSON from response
             response_text = response.content[0].text
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+            json_match = _CODEFENCE_RE.search(response_text)
             if json_match:
                 physical_data = json.loads(json_match.group(1))
             else:
@@ -572,7 +605,7 @@ def extract_physical_chemical_properties(text: str) -> Dict[str, str]:
                     physical_data = json.loads(response_text)
                 except:
                     # Try to find a JSON-like structure
-                    potential_json = re.search(r'({.*})', response_text, re.DOTALL)
+                    potential_json = _BRACE_RE.search(response_text)
                     if potential_json:
                         try:
                             physical_data = json.loads(potential_json.group(1))
@@ -596,7 +629,6 @@ def multi_pass_extraction(text: str) -> Dict[str, Any]:
         Dictionary with consolidated extracted data
     """
     # Get basic extraction
-    from ai_extractor import extract_with_ai
     basic_results = extract_with_ai(text)
     
     # Get hierarchical extraction
@@ -610,6 +642,8 @@ def multi_pass_extraction(text: str) -> Dict[str, Any]:
     
     # Combine results, preferring more specific extractions
     combined_results = basic_results.copy()
+    if any(_pass_failed(data) for data in (basic_results, hierarchical_results, first_aid_data, firefighting_data, hazard_data, physical_data)):
+        combined_results[_INCOMPLETE_KEY] = True
     
     # Only update fields that are missing or empty in the basic results
     for key, value in hierarchical_results.items():
@@ -705,7 +739,6 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
     Returns:
         Dictionary containing extracted fields
     """
-    print(f"DEBUG: ML extraction - strategy={strategy}, light_mode={light_mode}")
     logger.info(f"ML extraction starting - strategy={strategy}, light_mode={light_mode}")
     
     if not text:
@@ -716,19 +749,27 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
         logger.warning("No AI API keys available. Set OPENAI_API_KEY or ANTHROPIC_API_KEY environment variables.")
         return {"error": "No AI API keys available"}
     
-    # Import the AI extraction function once at the beginning to avoid import issues
-    from ai_extractor import extract_with_ai
-    
     # For all ML extraction strategies, always use light_mode when requested
     # This ensures we don't hit API limits and provides a consistent behavior
-    print(f"DEBUG: ML extraction requested with strategy={strategy}, light_mode={light_mode}")
     logger.info(f"ML extraction requested with strategy={strategy}, light_mode={light_mode}")
     
+    # Full strategies make several API calls, so cache their combined result;
+    # light mode goes through extract_with_ai, which has its own cache
+    cache_key = None if light_mode else ExtractionCache.make_key(text, f"ml:{strategy}")
+    if cache_key:
+        cached = EXTRACTION_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached ML extraction result (strategy={strategy})")
+            return cached
+    
+    # Only a strategy that ran every pass without falling back is worth caching
+    complete = True
+    
     try:
         # If light_mode is enabled, use the basic extraction to save API calls
         if light_mode:
             logger.info(f"Using light mode extraction (strategy={strategy})")
-            print(f"DEBUG: Using light_mode with extract_with_ai")
+            logger.debug("Using light_mode with extract_with_ai")
             results = extract_with_ai(text, light_mode=True)
             
         # Otherwise use the full extraction strategy
@@ -736,20 +777,22 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
             # Select extraction strategy
             if strategy == "direct_extraction":
                 # Use the basic extraction from ai_extractor.py
-                print(f"DEBUG: Using direct_extraction strategy")
+                logger.debug("Using direct_extraction strategy")
                 results = extract_with_ai(text)
                 
             elif strategy == "hierarchical_extraction":
-                print(f"DEBUG: Using hierarchical_extraction strategy")
+                logger.debug("Using hierarchical_extraction strategy")
                 results = hierarchical_extraction(text)
                 
             elif strategy == "specialized_extraction":
                 # First get basic info
-                print(f"DEBUG: Using specialized_extraction strategy")
+                logger.debug("Using specialized_extraction strategy")
                 results = extract_with_ai(text)
                 
                 # Get specialized extractions for key sections
                 first_aid_data = specialized_first_aid_extraction(text)
+                if _pass_failed(first_aid_data):
+                    complete = False
                 if first_aid_data and "error" not in first_aid_data:
                     if isinstance(first_aid_data, dict):
                         first_aid_str = "; ".join([f"{k}: {v}" for k, v in first_aid_data.items() if v])
@@ -758,6 +801,8 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
                         results["First Aid Measures"] = str(first_aid_data)
                     
                 firefighting_data = specialized_firefighting_extraction(text)
+                if _pass_failed(firefighting_data):
+                    complete = False
                 if firefighting_data and "error" not in firefighting_data:
                     if isinstance(firefighting_data, dict):
                         firefighting_str = "; ".join([f"{k}: {v}" for k, v in firefighting_data.items() if v])
@@ -766,32 +811,25 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
                         results["Firefighting Measures"] = str(firefighting_data)
                         
             elif strategy == "multi_pass_extraction":
-                print(f"DEBUG: Using multi_pass_extraction strategy")
+                logger.debug("Using multi_pass_extraction strategy")
                 results = multi_pass_extraction(text)
                 
             else:
                 # Default to basic extraction
-                print(f"DEBUG: Using default extraction as strategy '{strategy}' was not recognized")
+                logger.debug(f"Using default extraction as strategy '{strategy}' was not recognized")
                 results = extract_with_ai(text)
     
     except Exception as e:
         logger.error(f"Error in ML extraction: {str(e)}")
-        print(f"DEBUG: Error in ML extraction: {str(e)}")
         # Fallback to basic extraction on error
         results = extract_with_ai(text, light_mode=True)
+        complete = False
     
-    # Ensure all required fields exist
-    expected_fields = [
-        "Product Name", "CAS Number", "Chemical Identification", 
-        "Health Hazards", "Health Category", "Physical Hazards", 
-        "Physical Category", "Flash Point", "Appearance", "Odour", 
-        "Colour", "Storage Use", "Supplier/Manufacturer", 
-        "Dangerous Goods Class", "Packing Group", "Environmental Hazards",
-        "First Aid Measures", "Firefighting Measures"
-    ]
+    if results.pop(_INCOMPLETE_KEY, False):
+        complete = False
     
     # Add any missing fields with empty values
-    for field in expected_fields:
+    for field in _EXPECTED_FIELDS:
         if field not in results:
             results[field] = ""
     
@@ -804,6 +842,9 @@ def extract_sds_with_ml(text: str, strategy: str = "multi_pass_extraction", ligh
             dict_str = "; ".join([f"{k}: {v}" for k, v in value.items() if v])
             results[field] = dict_str
     
+    if cache_key and complete and "error" not in results:
+        EXTRACTION_CACHE.put(cache_key, results)
+    
     return results
 
 def extract_from_pdf_with_ml(pdf_path: str, strategy: str = "multi_pass_extraction", light_mode: bool = False) -> Dict[str, Any]:
@@ -1,23 +1,35 @@
 import pytesseract
 from PIL import Image
 import fitz  # PyMuPDF
-import tempfile
-import os
 import io
 import numpy as np
+from typing import Union
 
-def is_scanned_pdf(pdf_path: str) -> bool:
+from utils import open_pdf
+
+# Characters of text on the first page that mark a PDF as born-digital
+FAST_TEXT_THRESHOLD = 1000
+
+def is_scanned_pdf(pdf: Union[str, bytes]) -> bool:
     """
     Determine if a PDF is likely scanned (image-based) vs. digitally created.
     
     Args:
-        pdf_path: Path to the PDF file
+        pdf: Path to the PDF file, or the PDF contents as bytes
         
     Returns:
         Boolean indicating if the PDF is likely scanned
     """
     # Open the PDF
-    doc = fitz.open(pdf_path)
+    doc = open_pdf(pdf)
+    
+    # Fast path: a first page with plenty of text and no images is born-digital,
+    # so skip inspecting the remaining pages
+    if len(doc) > 0:
+        first_page = doc[0]
+        if len(first_page.get_text()) >= FAST_TEXT_THRESHOLD and not first_page.get_images():
+            doc.close()
+            return False
     
     # Check first few pages (up to 3)
     num_pages_to_check = min(3, len(doc))
@@ -46,18 +58,18 @@ def is_scanned_pdf(pdf_path: str) -> bool:
     
     return False
 
-def process_ocr(pdf_path: str) -> str:
+def process_ocr(pdf: Union[str, bytes]) -> str:
     """
     Process a PDF using OCR to extract text.
     
     Args:
-        pdf_path: Path to the PDF file
+        pdf: Path to the PDF file, or the PDF contents as bytes
         
     Returns:
         Extracted text from the PDF
     """
     # Open the PDF
-    doc = fitz.open(pdf_path)
+    doc = open_pdf(pdf)
     full_text = []
     
     # Process each page
@@ -72,18 +84,10 @@ def process_ocr(pdf_path: str) -> str:
             # Get the page as a pixmap
             pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
             
-            # Save as a temporary image file
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                pix.save(temp_file.name)
-                temp_path = temp_file.name
-            
-            # Perform OCR on the image
-            img = Image.open(temp_path)
+            # Perform OCR on the rendered image, kept in memory
+            img = Image.open(io.BytesIO(pix.tobytes("png")))
             ocr_text = pytesseract.image_to_string(img)
             
-            # Clean up the temporary file
-            os.unlink(temp_path)
-            
             # Add the OCR text
             full_text.append(ocr_text)
         else:
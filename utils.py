@@ -1,28 +1,50 @@
 import fitz  # PyMuPDF
 import base64
 from io import BytesIO
-import tempfile
 import os
+import csv
 import pandas as pd
 import json
+from typing import Union
+
+# PyArrow's multi-threaded C++ CSV reader/writer is used when available
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
 
 # Constants
 DATA_DIR = "data"
 REGISTER_FILE = os.path.join(DATA_DIR, "sds_register.csv")
 HISTORY_FILE = os.path.join(DATA_DIR, "extraction_history.json")
 
-def read_pdf_text(pdf_path: str) -> str:
+def open_pdf(pdf: Union[str, bytes]) -> fitz.Document:
+    """
+    Open a PDF from a path or from its contents in memory.
+    
+    Args:
+        pdf: Path to the PDF file, or the PDF contents as bytes
+        
+    Returns:
+        The opened PyMuPDF document
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        return fitz.open(stream=pdf, filetype="pdf")
+    return fitz.open(pdf)
+
+def read_pdf_text(pdf: Union[str, bytes]) -> str:
     """
     Extract text from a PDF file.
     
     Args:
-        pdf_path: Path to the PDF file
+        pdf: Path to the PDF file, or the PDF contents as bytes
         
     Returns:
         Extracted text as a string
     """
     # Open the PDF
-    doc = fitz.open(pdf_path)
+    doc = open_pdf(pdf)
     
     # Extract text from all pages
     full_text = []
@@ -37,6 +59,28 @@ def read_pdf_text(pdf_path: str) -> str:
     # Join text from all pages
     return "\n".join(full_text)
 
+def render_pdf_preview(pdf_bytes: bytes, zoom: float = 0.5) -> bytes:
+    """
+    Render the first page of a PDF as a PNG image.
+    
+    Args:
+        pdf_bytes: The contents of the PDF file
+        zoom: Scale factor applied to the page
+        
+    Returns:
+        PNG image data
+    """
+    # Open the PDF straight from memory
+    doc = open_pdf(pdf_bytes)
+    
+    try:
+        # Get the first page as an image for preview
+        page = doc[0]
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return pix.tobytes("png")
+    finally:
+        doc.close()
+
 def display_pdf(pdf_file) -> str:
     """
     Display a PDF file in Streamlit.
@@ -47,24 +91,7 @@ def display_pdf(pdf_file) -> str:
     Returns:
         HTML for displaying the PDF
     """
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(pdf_file.getvalue())
-        pdf_path = tmp.name
-    
-    # Open the PDF
-    doc = fitz.open(pdf_path)
-    
-    # Get the first page as an image for preview
-    page = doc[0]
-    pix = page.get_pixmap(matrix=fitz.Matrix(0.5, 0.5))
-    
-    # Convert to image data
-    img_data = pix.tobytes("png")
-    
-    # Clean up
-    doc.close()
-    os.unlink(pdf_path)
+    img_data = render_pdf_preview(pdf_file.getvalue())
     
     # Create the HTML for display
     image_html = f"""
@@ -112,6 +139,32 @@ def normalize_text(text: str) -> str:
     
     return text
 
+def dataframe_to_csv_bytes(df: pd.DataFrame, header: bool = True) -> bytes:
+    """
+    Serialize a dataframe to CSV, using PyArrow's CSV writer when available.
+    
+    Args:
+        df: The dataframe to serialize
+        header: Whether to write the header row
+        
+    Returns:
+        The CSV file contents as bytes
+    """
+    if pa is not None:
+        try:
+            buffer = BytesIO()
+            pa_csv.write_csv(
+                pa.Table.from_pandas(df, preserve_index=False), 
+                buffer, 
+                pa_csv.WriteOptions(include_header=header)
+            )
+            return buffer.getvalue()
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # Object columns holding mixed types can't be converted to Arrow
+            pass
+    
+    return df.to_csv(index=False, header=header).encode()
+
 def save_dataframe(df: pd.DataFrame, history: list = None) -> tuple:
     """
     Save the dataframe to the SQLite database.
@@ -136,7 +189,54 @@ def save_dataframe(df: pd.DataFrame, history: list = None) -> tuple:
             os.makedirs(DATA_DIR)
         
         # Save the dataframe to CSV as backup
-        df.to_csv(REGISTER_FILE, index=False)
+        with open(REGISTER_FILE, 'wb') as f:
+            f.write(dataframe_to_csv_bytes(df))
+        
+        return success, message
+    except Exception as e:
+        error_message = f"Error saving data: {e}"
+        print(error_message)
+        return False, error_message
+
+def append_to_register(df: pd.DataFrame, new_count: int) -> tuple:
+    """
+    Persist rows just added to the end of the register without rewriting the
+    existing ones. Falls back to a full save_dataframe when the rows can't
+    simply be appended.
+    
+    Args:
+        df: The full dataframe, ending with the new rows
+        new_count: Number of rows that were added
+        
+    Returns:
+        Tuple of (success, message)
+    """
+    if new_count <= 0:
+        return True, "No new rows to save"
+    
+    try:
+        # Read the header of the CSV backup to line the new rows up with it
+        header = None
+        if os.path.exists(REGISTER_FILE) and os.path.getsize(REGISTER_FILE) > 0:
+            # utf-8-sig drops the byte order mark if the file was saved from Excel
+            with open(REGISTER_FILE, 'r', newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), None)
+        
+        # New columns would need the whole backup rewritten with a wider header
+        if header is None or not set(df.columns) <= set(header):
+            return save_dataframe(df)
+        
+        new_df = df.iloc[-new_count:]
+        
+        # Import the database handler functions
+        from db_handler import append_to_database
+        
+        success, message = append_to_database(new_df.to_dict(orient='records'))
+        if not success:
+            return save_dataframe(df)
+        
+        with open(REGISTER_FILE, 'ab') as f:
+            f.write(dataframe_to_csv_bytes(new_df.reindex(columns=header), header=False))
         
         return success, message
     except Exception as e:
@@ -166,7 +266,7 @@ def load_dataframe() -> tuple:
             
             # Load the dataframe if the file exists
             if os.path.exists(REGISTER_FILE):
-                df = pd.read_csv(REGISTER_FILE)
+                df = pd.read_csv(REGISTER_FILE, engine="pyarrow" if pa is not None else "c")
             
             # Load the extraction history if the file exists
             if os.path.exists(HISTORY_FILE):